@@ -0,0 +1,382 @@
+# ---------------- BENCHMARKS ----------------
+# Offline, reproducible benchmarks for the Naive Bayes model and every NLP
+# operation, over generated data (fixed seeds, no downloads):
+#   nb.fit                   NaiveBayesModel.fit on a categorical table
+#   nb.predict_proba         one row per call (latency per call)
+#   nb.predict_proba_batch   predict_proba_batch over the table, in batches
+#   nlp.<op>                 nlp_engine.run(op) on a generated corpus, cold
+# Each case runs in a fresh process, so peak RSS is the case's own and no
+# cache carries over between cases. Results can be saved as a JSON baseline
+# and a later run compared against it:
+#   python benchmark.py --save base.json
+#   python benchmark.py --compare base.json      (exit status 1 on regressions)
+# Sizes take K / M / G suffixes (powers of 1000); --full runs tables of
+# 10^3 to 10^7 rows and corpora of 1 KB to 500 MB.
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+import nlp_engine
+
+ROW_SIZES = "1K,10K,100K,1M"
+TEXT_SIZES = "1K,100K,1M"
+FULL_ROW_SIZES = "1K,10K,100K,1M,10M"
+FULL_TEXT_SIZES = "1K,100K,10M,100M,500M"
+
+N_FEATURES = 8
+N_CLASSES = 3
+CARDINALITIES = (2, 3, 5, 8, 12, 20, 50, 200)
+VOCAB_SIZE = 20000
+BATCH_ROWS = 10000
+
+def parse_size(s):
+    s = s.strip().upper()
+    scale = {"K": 10 ** 3, "M": 10 ** 6, "G": 10 ** 9}.get(s[-1:], 1)
+    return int(float(s[:-1] if scale > 1 else s) * scale)
+
+def size_label(n):
+    for suffix, scale in (("G", 10 ** 9), ("M", 10 ** 6), ("K", 10 ** 3)):
+        if n >= scale and n % scale == 0:
+            return f"{n // scale}{suffix}"
+    return str(n)
+
+def percentile(values, q):
+    # linear interpolation between closest ranks; values must be sorted
+    if len(values) == 1:
+        return values[0]
+    pos = (len(values) - 1) * q / 100
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+def peak_rss_mb():
+    # peak resident set size of this process so far, or None if unknown
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+# ---------------- DATA ----------------
+def make_table(n_rows, seed=0):
+    # N_FEATURES categorical columns plus a target; each feature leans
+    # towards a slice of its values that depends on the class
+    import numpy as np
+    from dataset import CHUNK_ROWS, CategoricalTable
+    rng = np.random.default_rng(seed)
+    table = CategoricalTable([f"f{i}" for i in range(N_FEATURES)] + ["target"])
+    values = [[f"v{c}" for c in range(card)] for card in CARDINALITIES]
+    labels = [f"class{c}" for c in range(N_CLASSES)]
+    for start in range(0, n_rows, CHUNK_ROWS):
+        m = min(CHUNK_ROWS, n_rows - start)
+        y = rng.integers(0, N_CLASSES, m)
+        for i, card in enumerate(CARDINALITIES):
+            width = max(card // N_CLASSES, 1)
+            leaning = (y * card // N_CLASSES + rng.integers(0, width, m)) % card
+            x = np.where(rng.random(m) < 0.6, leaning, rng.integers(0, card, m))
+            table.add_codes(i, x, values[i])
+        table.add_codes(N_FEATURES, y, labels)
+    return table
+
+def table_rows(table, start, end, cols):
+    # rows [start, end) of the given columns, as tuples of strings
+    return list(zip(*(map(table.categories[j].__getitem__, table.codes[j][start:end]) for j in cols)))
+
+def make_text(n_bytes, seed=0):
+    # Zipf-distributed words from a synthetic vocabulary, in sentences of
+    # 3-20 words and paragraphs of 2-8 sentences
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    syllables = ["ka", "lo", "mi", "ten", "ra", "su", "vel", "do", "pri", "an", "or", "es"]
+    words = {"the", "of", "and", "a", "to", "in", "is", "it"}
+    words = sorted(words) + sorted({"".join(rng.choice(syllables, rng.integers(1, 5)))
+                                    for _ in range(VOCAB_SIZE)} - words)
+    # forms: plain, sentence start, sentence end, paragraph end
+    forms = np.array([words, [w.capitalize() for w in words],
+                      [w + "." for w in words], [w + ".\n\n" for w in words]], dtype=object)
+    weights = 1 / np.arange(1, len(words) + 1)
+    weights /= weights.sum()
+    parts, size = [], 0
+    while size < n_bytes:
+        n_sents = 2000
+        lengths = rng.integers(3, 21, n_sents)
+        idx = rng.choice(len(words), int(lengths.sum()), p=weights)
+        form = np.zeros(len(idx), dtype=np.int64)
+        ends = np.cumsum(lengths) - 1
+        form[ends - lengths + 1] = 1
+        form[ends] = 2
+        form[ends[rng.random(n_sents) < 0.2]] = 3
+        part = " ".join(forms[form, idx].tolist()) + " "
+        parts.append(part)
+        size += len(part)
+    text = "".join(parts)[:n_bytes]
+    cut = text.rfind(" ")
+    return text[:cut] if cut > 0 else text
+
+# ---------------- CASES ----------------
+def measure(fn, repeat, max_time, setup=None):
+    # timings of up to `repeat` runs of fn; stops early (after at least one
+    # run) once max_time seconds have been spent. setup() runs untimed
+    # before each run
+    times = []
+    begin = time.perf_counter()
+    while len(times) < repeat:
+        if setup is not None:
+            setup()
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+        if time.perf_counter() - begin > max_time:
+            break
+    return times
+
+def summary(times, n, unit, throughput):
+    s = sorted(times)
+    return {"n": n, "unit": unit, "runs": len(s), "seconds": times,
+            "min": s[0], "mean": sum(s) / len(s),
+            "p50": percentile(s, 50), "p90": percentile(s, 90), "p99": percentile(s, 99),
+            "throughput": throughput}
+
+def bench_nb(bench, n_rows, args):
+    from naive_bayes import NaiveBayesModel
+    table = make_table(n_rows, args.seed)
+    model = NaiveBayesModel().fit(table, table.cols)
+    setup_rss = peak_rss_mb()
+    features = range(N_FEATURES)
+
+    if bench == "nb.fit":
+        times = measure(lambda: NaiveBayesModel().fit(table, table.cols), args.repeat, args.max_time)
+        res = summary(times, n_rows, "rows", n_rows / percentile(sorted(times), 50))
+    elif bench == "nb.predict_proba":
+        import random
+        rng = random.Random(args.seed)
+        picks = [rng.randrange(n_rows) for _ in range(args.calls)]
+        rows = [table[i][:N_FEATURES] for i in picks]
+        times = []
+        for row in rows:
+            t = time.perf_counter()
+            model.predict_proba(row)
+            times.append(time.perf_counter() - t)
+        res = summary(times, len(rows), "calls", len(rows) / sum(times))
+        res["seconds"] = None  # one entry per call: too many to keep
+    else:  # nb.predict_proba_batch
+        model.predict_proba_batch(table_rows(table, 0, min(n_rows, 100), features))  # compile
+        times = []
+        total = 0.0
+        for start in range(0, n_rows, args.batch):
+            rows = table_rows(table, start, min(start + args.batch, n_rows), features)
+            t = time.perf_counter()
+            model.predict_proba_batch(rows)
+            times.append(time.perf_counter() - t)
+            total += times[-1]
+        res = summary(times, n_rows, "rows", n_rows / total)
+        res["batch"] = args.batch
+    res["setup_rss_mb"] = setup_rss
+    return res
+
+def bench_nlp(bench, n_bytes, args):
+    op = nlp_engine.CLI_NAMES[bench.split(".", 1)[1]]
+    try:
+        nlp_engine.require(op)
+    except nlp_engine.MissingResource as e:
+        return {"skipped": str(e)}
+    text = make_text(n_bytes, args.seed)
+    nlp_engine.run(op, make_text(10000, args.seed + 1), workers=args.workers)  # load NLTK models
+    setup_rss = peak_rss_mb()
+
+    def cold_start():
+        # Analyses and stem / lemma results are cached; drop them so each run
+        # starts over. Pool workers have caches of their own, so the pool is
+        # replaced too (its processes are forked again inside the timed run).
+        nlp_engine.clear_caches()
+        nlp_engine.shutdown_pool()
+
+    times = measure(lambda: nlp_engine.run(op, text, workers=args.workers), args.repeat,
+                    args.max_time, setup=cold_start)
+    res = summary(times, len(text), "bytes", len(text) / 10 ** 6 / percentile(sorted(times), 50))
+    res["workers"] = args.workers
+    res["setup_rss_mb"] = setup_rss
+    return res
+
+def run_case(bench, n, args):
+    try:
+        if bench.startswith("nb."):
+            res = bench_nb(bench, n, args)
+        else:
+            res = bench_nlp(bench, n, args)
+    except MemoryError:
+        return {"error": "out of memory"}
+    if "skipped" not in res:
+        res["peak_rss_mb"] = peak_rss_mb()
+    return res
+
+def _case_process(conn, bench, n, args):
+    try:
+        conn.send(run_case(bench, n, args))
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    conn.close()
+
+def run_isolated(bench, n, args):
+    # one fresh interpreter per case
+    import multiprocessing as mp
+    ctx = mp.get_context("spawn")
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_case_process, args=(send, bench, n, args))
+    proc.start()
+    send.close()
+    try:
+        res = recv.recv()
+    except EOFError:  # killed, e.g. by the OOM killer
+        res = None
+    proc.join()
+    return res if res is not None else {"error": f"worker exited with code {proc.exitcode}"}
+
+# ---------------- REPORT ----------------
+def fmt_seconds(s):
+    if s is None:
+        return "-"
+    if s < 1e-3:
+        return f"{s * 1e6:.1f}µs"
+    if s < 1:
+        return f"{s * 1e3:.1f}ms"
+    return f"{s:.2f}s"
+
+def fmt_throughput(r):
+    if r["unit"] == "bytes":
+        return f"{r['throughput']:.2f} MB/s"
+    return f"{r['throughput']:,.0f} {r['unit']}/s"
+
+def fmt_mb(mb):
+    return "-" if mb is None else f"{mb:.0f} MB"
+
+def case_key(r):
+    return f"{r['bench']} {r['size']}"
+
+def print_result(r, out=sys.stdout):
+    key = case_key(r)
+    if "skipped" in r or "error" in r:
+        msg = r.get("skipped") or "ERROR: " + r["error"]
+        print(f"{key:<32} {msg.splitlines()[0]}", file=out, flush=True)
+        return
+    print(f"{key:<32} {fmt_seconds(r['p50']):>9} {fmt_seconds(r['p90']):>9} {fmt_seconds(r['p99']):>9}"
+          f"  {fmt_throughput(r):>16}  {fmt_mb(r['peak_rss_mb']):>8}  ({r['runs']} run(s))",
+          file=out, flush=True)
+
+def compare(results, baseline, threshold, out=sys.stdout):
+    # p50 time and peak RSS against the baseline; returns the regressions
+    for field in ("python", "machine", "cpu_count"):
+        if baseline["meta"].get(field) != results["meta"].get(field):
+            print(f"note: baseline {field} was {baseline['meta'].get(field)!r}, "
+                  f"now {results['meta'].get(field)!r}", file=out)
+    old = {case_key(r): r for r in baseline["results"] if "p50" in r}
+    regressions = []
+    print(f"\n{'case':<32} {'base p50':>9} {'new p50':>9} {'change':>8}  {'base RSS':>8} {'new RSS':>8}",
+          file=out)
+    for r in results["results"]:
+        b = old.get(case_key(r))
+        if b is None or "p50" not in r:
+            continue
+        change = r["p50"] / b["p50"] - 1 if b["p50"] else 0.0
+        flags = []
+        if change > threshold:
+            flags.append("SLOWER")
+        elif change < -threshold:
+            flags.append("faster")
+        if r.get("peak_rss_mb") and b.get("peak_rss_mb") and r["peak_rss_mb"] > b["peak_rss_mb"] * (1 + threshold):
+            flags.append("MORE MEMORY")
+        if "SLOWER" in flags or "MORE MEMORY" in flags:
+            regressions.append(case_key(r))
+        print(f"{case_key(r):<32} {fmt_seconds(b['p50']):>9} {fmt_seconds(r['p50']):>9} {change:>+8.1%}  "
+              f"{fmt_mb(b.get('peak_rss_mb')):>8} {fmt_mb(r.get('peak_rss_mb')):>8}  {' '.join(flags)}",
+              file=out)
+    return regressions
+
+def environment():
+    import numpy
+    meta = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()}", "cpu_count": os.cpu_count(),
+            "numpy": numpy.__version__}
+    try:
+        import subprocess
+        here = os.path.dirname(os.path.abspath(__file__))
+        meta["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here,
+                                        capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        meta["commit"] = None
+    return meta
+
+# ---------------- CLI ----------------
+NB_BENCHES = ["nb.fit", "nb.predict_proba", "nb.predict_proba_batch"]
+NLP_BENCHES = ["nlp." + name for name in nlp_engine.CLI_NAMES]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark Naive Bayes and the NLP operations.")
+    ap.add_argument("only", nargs="*", metavar="bench",
+                    help="benchmarks to run, or prefixes such as nb / nlp (default: all); "
+                         "one of " + ", ".join(NB_BENCHES + NLP_BENCHES))
+    ap.add_argument("--rows", help=f"table sizes for nb.* (default {ROW_SIZES})")
+    ap.add_argument("--text", help=f"corpus sizes in bytes for nlp.* (default {TEXT_SIZES})")
+    ap.add_argument("--full", action="store_true",
+                    help=f"rows {FULL_ROW_SIZES} and text {FULL_TEXT_SIZES}")
+    ap.add_argument("-r", "--repeat", type=int, default=5, help="runs per case (default 5)")
+    ap.add_argument("--max-time", type=float, default=30.0, metavar="S",
+                    help="stop repeating a case after S seconds (default 30)")
+    ap.add_argument("--calls", type=int, default=2000, help="nb.predict_proba calls (default 2000)")
+    ap.add_argument("--batch", type=int, default=BATCH_ROWS,
+                    help=f"rows per nb.predict_proba_batch call (default {BATCH_ROWS})")
+    ap.add_argument("-j", "--workers", type=int, default=1,
+                    help="worker processes for nlp.* (0 = one per CPU core)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--save", metavar="FILE", help="write the results as a JSON baseline")
+    ap.add_argument("--compare", metavar="FILE", help="compare against a saved baseline")
+    ap.add_argument("--threshold", type=float, default=0.10,
+                    help="relative change counted as a regression (default 0.10)")
+    ap.add_argument("--in-process", action="store_true",
+                    help="run every case in this process (peak RSS is then cumulative)")
+    args = ap.parse_args(argv)
+    args.workers = args.workers or nlp_engine.default_workers()
+
+    benches = [b for b in NB_BENCHES + NLP_BENCHES
+               if not args.only or any(b == o or b.startswith(o + ".") for o in args.only)]
+    if not benches:
+        ap.error("no benchmark matches " + " ".join(args.only))
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    rows = [parse_size(s) for s in (args.rows or (FULL_ROW_SIZES if args.full else ROW_SIZES)).split(",")]
+    text = [parse_size(s) for s in (args.text or (FULL_TEXT_SIZES if args.full else TEXT_SIZES)).split(",")]
+
+    results = {"meta": environment(), "results": []}
+    print(f"{'case':<32} {'p50':>9} {'p90':>9} {'p99':>9}  {'throughput':>16}  {'peak RSS':>8}")
+    for bench in benches:
+        for n in (rows if bench.startswith("nb.") else text):
+            res = run_case(bench, n, args) if args.in_process else run_isolated(bench, n, args)
+            res = {"bench": bench, "size": size_label(n), **res}
+            results["results"].append(res)
+            print_result(res)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+        print(f"\nsaved {len(results['results'])} result(s) → {args.save}", file=sys.stderr)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): " + ", ".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# ---------------- CANVAS RENDERING ----------------
+# Helpers for the GUI's Tk canvases: a scheduler that coalesces redraw
+# requests (a window drag fires dozens of <Configure> events per frame) and
+# pre-rendered gradient images, so a resize only moves existing items.
+import tkinter as tk
+from collections import OrderedDict
+
+FRAME_MS = 16
+GRADIENT_STEP = 64  # gradient widths are rounded up to this, see gradients()
+GRADIENT_CACHE_SIZE = 16
+
+class RenderScheduler:
+    # Each key is redrawn at most once per frame, with the arguments of its
+    # latest request; earlier requests within the frame are dropped.
+    def __init__(self, widget, delay=FRAME_MS):
+        self.widget = widget
+        self.delay = delay
+        self._pending = {}
+        self._after = None
+
+    def schedule(self, key, fn, *args):
+        self._pending[key] = (fn, args)
+        if self._after is None:
+            self._after = self.widget.after(self.delay, self.flush)
+
+    def flush(self):
+        if self._after is not None:
+            self.widget.after_cancel(self._after)
+            self._after = None
+        pending, self._pending = self._pending, {}
+        for fn, args in pending.values():
+            fn(*args)
+
+def mix(c1, c2, t):
+    def h2i(h): return int(h, 16)
+    r1,g1,b1 = h2i(c1[1:3]), h2i(c1[3:5]), h2i(c1[5:7])
+    r2,g2,b2 = h2i(c2[1:3]), h2i(c2[3:5]), h2i(c2[5:7])
+    r = int(r1*(1-t) + r2*t); g = int(g1*(1-t) + g2*t); b = int(b1*(1-t) + b2*t)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+def gradient_image(master, width, height, c1, c2, band=4):
+    # left-to-right gradient in bands of `band` pixels. One row of pixels is
+    # passed to Tk, which tiles it down the image
+    row = []
+    for i in range(0, width, band):
+        row += [mix(c1, c2, i / width)] * min(band, width - i)
+    img = tk.PhotoImage(master=master, width=width, height=height)
+    img.put("{" + " ".join(row) + "}", to=(0, 0, width, height))
+    return img
+
+class GradientCache:
+    # Gradient images by width. Widths are rounded up to GRADIENT_STEP (the
+    # canvas clips the overhang), so a drag-resize reuses a handful of images
+    # instead of rendering one per pixel of width.
+    def __init__(self, master, height, c1, c2):
+        self.master = master
+        self.height = height
+        self.colors = (c1, c2)
+        self._images = OrderedDict()
+
+    def get(self, width):
+        width = max(GRADIENT_STEP, -(-width // GRADIENT_STEP) * GRADIENT_STEP)
+        img = self._images.get(width)
+        if img is None:
+            img = self._images[width] = gradient_image(self.master, width, self.height, *self.colors)
+            if len(self._images) > GRADIENT_CACHE_SIZE:
+                self._images.popitem(last=False)
+        else:
+            self._images.move_to_end(width)
+        return img
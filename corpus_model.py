@@ -0,0 +1,250 @@
+# ---------------- CORPUS MODEL ----------------
+# A fitted TF-IDF model (vocabulary, idf vector and document-term matrix)
+# stored as plain NumPy files in one directory:
+#   meta.json                       counts and format version, written last
+#   terms.bin + term_offsets.npy    sorted vocabulary, UTF-8, one blob
+#   idf.npy                         float64 per term
+#   indptr.npy, indices.npy, data.npy   CSR rows, l2-normalised tf-idf (float32)
+# load() memory-maps every array, so opening is O(1) whatever the size and
+# queries only touch the pages they read.
+import argparse
+import json
+import math
+import os
+import sys
+from bisect import bisect_left
+from contextlib import nullcontext
+
+import nlp_engine
+
+FORMAT_VERSION = 1
+
+class TermIndex:
+    # sorted vocabulary over a byte blob; lookups binary-search the blob.
+    # Both arrays are read through memoryviews, which index several times
+    # faster than numpy memmaps; a lookup reads ~20 terms
+    def __init__(self, blob, offsets):
+        self.blob = memoryview(blob).cast("B")
+        self.offsets = memoryview(offsets).cast("B").cast("q")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8", "surrogatepass")
+
+    def get(self, term, default=-1):
+        i = bisect_left(self, term)
+        return i if i < len(self) and self[i] == term else default
+
+def write_terms(path, vocab):
+    # sorted vocabulary -> terms.bin + term_offsets.npy in directory `path`
+    import numpy as np
+    encoded = [w.encode("utf-8", "surrogatepass") for w in vocab]
+    with open(os.path.join(path, "terms.bin"), "wb") as f:
+        for b in encoded:
+            f.write(b)
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(os.path.join(path, "term_offsets.npy"), offsets)
+
+def load_terms(path):
+    # memory-mapped TermIndex over the files written by write_terms()
+    import numpy as np
+    blob_path = os.path.join(path, "terms.bin")
+    # an empty file cannot be mapped
+    blob = np.memmap(blob_path, dtype=np.uint8, mode="r") if os.path.getsize(blob_path) else b""
+    return TermIndex(blob, np.load(os.path.join(path, "term_offsets.npy"), mmap_mode="r"))
+
+class CorpusModel:
+    def __init__(self, terms, idf, dtm, meta):
+        self.terms = terms
+        self.idf = idf
+        self.dtm = dtm
+        self.meta = meta
+
+    @property
+    def n_docs(self):
+        return self.dtm.shape[0]
+
+    @classmethod
+    def load(cls, path):
+        import numpy as np
+        from scipy import sparse
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported model format {meta.get('format')!r}")
+        arr = lambda name: np.load(os.path.join(path, name), mmap_mode="r")
+        terms = load_terms(path)
+        dtm = sparse.csr_matrix((arr("data.npy"), arr("indices.npy"), arr("indptr.npy")),
+                                shape=(meta["n_docs"], meta["n_terms"]), copy=False)
+        return cls(terms, arr("idf.npy"), dtm, meta)
+
+    def document(self, i, k=10):
+        # top-k (term, weight) pairs of document i (0-based); reads one row
+        return nlp_engine.TermVector(self.terms, self.dtm[i]).top(k)
+
+    def transform(self, counts):
+        # l2-normalised tf-idf of new text over the stored vocabulary; terms
+        # the model has never seen are dropped, as with a fitted vectorizer
+        import numpy as np
+        from scipy import sparse
+        hits = sorted((j, c) for j, c in ((self.terms.get(w), c) for w, c in counts.items()) if j >= 0)
+        cols = np.fromiter((j for j, _ in hits), dtype=np.int64, count=len(hits))
+        data = np.fromiter((c for _, c in hits), dtype=np.float64, count=len(hits)) * self.idf[cols]
+        data /= math.sqrt(float(data @ data)) or 1.0
+        row = sparse.csr_matrix((data, cols, [0, len(cols)]), shape=(1, len(self.terms)))
+        return nlp_engine.TermVector(self.terms, row)
+
+    def similar(self, vec, k=10):
+        # (document number, cosine similarity) of the k closest documents
+        import numpy as np
+        scores = (self.dtm @ vec.row.T).toarray().ravel()
+        k = min(k, len(scores))
+        if not k:
+            return []
+        pick = np.argpartition(-scores, k - 1)[:k]
+        pick = pick[np.lexsort((pick, -scores[pick]))]
+        return [(int(i) + 1, float(scores[i])) for i in pick if scores[i] > 0]
+
+    def query(self, text, progress=None, cancel=None, workers=1, k=10, stage=None):
+        # result dict for the GUIs: the text's terms weighted by this model.
+        # stage: as in nlp_engine.run
+        nlp_engine.require("TF-IDF")
+        stage = stage or (lambda name: nullcontext())
+        with stage("tokenize"):
+            an = nlp_engine.analysis(text).build(progress=progress, cancel=cancel, workers=workers)
+        with stage("vectorize"):
+            vec = self.transform(an.counts)
+        with stage("similar"):
+            return {"terms": vec, "similar": self.similar(vec, k)}
+
+def fit(docs, path, unit="", workers=1, progress=None, cancel=None):
+    # Fits on docs (a list, or a zero-arg callable returning a fresh iterable
+    # as in nlp_engine.corpus_tf_idf) and writes the model to `path`. The
+    # matrix is written straight into memory-mapped files by a second pass,
+    # so only the vocabulary has to fit in memory.
+    import numpy as np
+    from numpy.lib.format import open_memmap
+    if isinstance(docs, list):
+        source, kept = (lambda: docs), []
+    else:
+        source, kept = docs, None
+    total = len(docs) if kept is not None else None
+
+    df = {}
+    n_docs = nnz = 0
+    for counts in nlp_engine._iter_doc_counts(source(), workers, cancel):
+        for w in counts:
+            df[w] = df.get(w, 0) + 1
+        n_docs += 1
+        nnz += len(counts)
+        if kept is not None:
+            kept.append(counts)
+        if progress is not None and total:
+            progress(n_docs, total)
+
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)  # the model is incomplete until meta.json is back
+    vocab = sorted(df)
+    ids = {w: j for j, w in enumerate(vocab)}
+    write_terms(path, vocab)
+    dfs = np.fromiter((df[w] for w in vocab), dtype=np.float64, count=len(vocab))
+    idf = np.log((1 + n_docs) / (1 + dfs)) + 1
+    np.save(os.path.join(path, "idf.npy"), idf)
+    del df, dfs
+
+    # int32 indices when they fit: scipy then uses the mapped arrays as-is
+    index_dtype = np.int32 if max(nnz, len(vocab)) < 2 ** 31 else np.int64
+    mm = lambda name, dtype, n: open_memmap(os.path.join(path, name), mode="w+", dtype=dtype, shape=(n,))
+    indptr = mm("indptr.npy", index_dtype, n_docs + 1)
+    indices = mm("indices.npy", index_dtype, nnz)
+    data = mm("data.npy", np.float32, nnz)
+    indptr[0] = 0
+    pos = 0
+    rows = kept if kept is not None else nlp_engine._iter_doc_counts(source(), workers, cancel)
+    for i, counts in enumerate(rows):
+        if i % 256 == 0:
+            nlp_engine._check(cancel)
+        cols = np.fromiter((ids[w] for w in counts), dtype=np.int64, count=len(counts))
+        vals = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * idf[cols]
+        vals /= math.sqrt(float(vals @ vals)) or 1.0
+        order = np.argsort(cols)
+        indices[pos:pos + len(cols)] = cols[order]
+        data[pos:pos + len(cols)] = vals[order]
+        pos += len(cols)
+        indptr[i + 1] = pos
+    for a in (indptr, indices, data):
+        a.flush()
+    del indptr, indices, data
+
+    meta = {"format": FORMAT_VERSION, "n_docs": n_docs, "n_terms": len(vocab), "nnz": nnz,
+            "unit": unit}
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+# ---------------- CLI ----------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Fit, save and query TF-IDF corpus models.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    fp = sub.add_parser("fit", help="fit a model on text files and save it to MODEL_DIR")
+    fp.add_argument("model_dir")
+    fp.add_argument("inputs", nargs="+", metavar="input")
+    fp.add_argument("--docs", choices=["paragraphs", "lines", "files"], default="lines",
+                    help="what counts as one document (default: lines)")
+    fp.add_argument("-j", "--workers", type=int, default=1,
+                    help="worker processes (0 = one per CPU core)")
+    qp = sub.add_parser("query", help="weight a text with a saved model and find similar documents")
+    qp.add_argument("model_dir")
+    qp.add_argument("input", nargs="?", default="-", help="text file (default: stdin)")
+    qp.add_argument("-k", "--top", type=int, default=10, metavar="K")
+    dp = sub.add_parser("doc", help="top terms of one stored document")
+    dp.add_argument("model_dir")
+    dp.add_argument("number", type=int, help="document number, from 1")
+    dp.add_argument("-k", "--top", type=int, default=10, metavar="K")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "fit":
+        try:
+            nlp_engine.require("TF-IDF")
+        except nlp_engine.MissingResource as e:
+            print(e, file=sys.stderr)
+            return 1
+        workers = args.workers or nlp_engine.default_workers()
+        meta = fit(lambda: nlp_engine.read_documents(args.inputs, args.docs), args.model_dir,
+                   unit=args.docs, workers=workers)
+        print(f"{meta['n_docs']} document(s), {meta['n_terms']} term(s), "
+              f"{meta['nnz']} nonzero(s) → {args.model_dir}", file=sys.stderr)
+        return 0
+
+    model = CorpusModel.load(args.model_dir)
+    if args.cmd == "doc":
+        if not 1 <= args.number <= model.n_docs:
+            ap.error(f"document number must be between 1 and {model.n_docs}")
+        for w, v in model.document(args.number - 1, args.top):
+            print(f"{w}: {v:.4f}")
+        return 0
+
+    if args.input == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            text = f.read()
+    try:
+        res = model.query(text, k=args.top)
+    except nlp_engine.MissingResource as e:
+        print(e, file=sys.stderr)
+        return 1
+    for w, v in res["terms"].top(args.top):
+        print(f"{w}: {v:.4f}")
+    print()
+    for i, score in res["similar"]:
+        print(f"doc {i}\t{score:.4f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+# ---------------- DATASET FILES ----------------
+# Loads CSV / TSV (and Parquet when pyarrow is installed) into a
+# CategoricalTable: every column is dictionary-encoded on the fly into an
+# array of small integer codes (1, 2 or 4 bytes per cell) plus its list of
+# distinct values, so a file is read in chunks and never held as Python
+# strings. The target column is moved last, which is where NaiveBayesModel
+# expects it.
+# Every dataset in the GUI is a CategoricalTable; model fitting, the preview
+# filter and sorting read the code arrays directly. A table is also a
+# sequence of rows (lists of strings) for row-at-a-time code such as the
+# preview window and partial_fit.
+import csv
+import os
+from array import array
+
+CHUNK_ROWS = 65536
+TARGET_NAMES = ("target", "label", "class", "y", "outcome")
+
+# code arrays start at one byte per cell and widen when a column outgrows them
+CODE_TYPES = (("B", 1 << 8), ("H", 1 << 16), ("i", 1 << 31))
+NUMPY_TYPES = {"B": "uint8", "H": "uint16", "i": "int32"}
+
+class CategoricalTable:
+    def __init__(self, cols, rows=()):
+        self.cols = list(cols)
+        self.categories = [[] for _ in self.cols]  # code -> value, per column
+        self.codes = [array("B") for _ in self.cols]
+        self._lookup = [{} for _ in self.cols]  # value -> code, per column
+        self.extend(rows)
+
+    def __len__(self):
+        return len(self.codes[0]) if self.codes else 0
+
+    def __getitem__(self, i):
+        return [cats[codes[i]] for cats, codes in zip(self.categories, self.codes)]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def code(self, j, value):
+        # code of value in column j, or None if it never occurs
+        return self._lookup[j].get(value)
+
+    def column(self, j):
+        # codes of column j as a numpy array. A copy: a live view would stop
+        # the array from growing on the next extend()
+        import numpy as np
+        codes = self.codes[j]
+        return np.frombuffer(codes, dtype=NUMPY_TYPES[codes.typecode]).copy()
+
+    def extend(self, rows):
+        # rows: lists of values in column order (appended in chunks). Rows of
+        # the wrong length are padded with "" or truncated, as _load_csv does
+        width = len(self.cols)
+        chunk = []
+        for row in rows:
+            if len(row) != width:
+                row = (list(row) + [""] * width)[:width]
+            chunk.append(row)
+            if len(chunk) >= CHUNK_ROWS:
+                self.add_columns(list(zip(*chunk)))
+                chunk = []
+        if chunk:
+            self.add_columns(list(zip(*chunk)))
+
+    def add_columns(self, columns):
+        # one chunk, column-major: columns[j] holds the chunk's values of column j
+        for j, values in enumerate(columns):
+            cats, lookup = self.categories[j], self._lookup[j]
+            get = lookup.get
+            out = []
+            for v in values:
+                c = get(v)
+                if c is None:
+                    c = lookup[v] = len(cats)
+                    cats.append(v)
+                out.append(c)
+            self._widen(j)
+            self.codes[j].fromlist(out)
+
+    def add_codes(self, j, local_codes, values):
+        # a chunk already dictionary-encoded by the reader (Parquet):
+        # local_codes index into `values`, remapped here to this table's codes
+        cats, lookup = self.categories[j], self._lookup[j]
+        remap = []
+        for v in values:
+            c = lookup.get(v)
+            if c is None:
+                c = lookup[v] = len(cats)
+                cats.append(v)
+            remap.append(c)
+        if remap:
+            import numpy as np
+            self._widen(j)
+            dtype = NUMPY_TYPES[self.codes[j].typecode]
+            self.codes[j].frombytes(np.asarray(remap, dtype=dtype)[local_codes].tobytes())
+
+    def _widen(self, j):
+        n = len(self.categories[j])
+        codes = self.codes[j]
+        for typecode, limit in CODE_TYPES:
+            if n <= limit:
+                if typecode != codes.typecode:
+                    self.codes[j] = array(typecode, codes)
+                return
+        raise OverflowError(f"column {self.cols[j]!r} has too many distinct values")
+
+    def nbytes(self):
+        return sum(c.itemsize * len(c) for c in self.codes)
+
+def infer_target(cols):
+    # a column named like a label, else the last column
+    lowered = [c.strip().lower() for c in cols]
+    for name in TARGET_NAMES:
+        if name in lowered:
+            return lowered.index(name)
+    return len(cols) - 1
+
+def _target_last(cols, target):
+    t = infer_target(cols) if target is None else cols.index(target)
+    return [j for j in range(len(cols)) if j != t] + [t]
+
+def load_table(path, target=None, progress=None, chunk_rows=CHUNK_ROWS):
+    # progress(fraction) is called once per chunk
+    if path.lower().endswith((".parquet", ".pq")):
+        return _load_parquet(path, target, progress, chunk_rows)
+    return _load_csv(path, target, progress, chunk_rows)
+
+def _load_csv(path, target, progress, chunk_rows):
+    delimiter = "\t" if path.lower().endswith((".tsv", ".tab")) else ","
+    size = os.path.getsize(path) or 1
+    read = [0]
+
+    def counted(f):
+        for line in f:
+            read[0] += len(line)
+            yield line
+
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.reader(counted(f), delimiter=delimiter)
+        header = next(reader, None)
+        if not header:
+            raise ValueError(f"{path}: empty file")
+        header = [h.strip() for h in header]
+        order = _target_last(header, target)
+        table = CategoricalTable([header[j] for j in order])
+        width = len(header)
+        chunk = []
+        for row in reader:
+            if not row:
+                continue
+            if len(row) != width:
+                row = (row + [""] * width)[:width]
+            chunk.append([row[j].strip() for j in order])
+            if len(chunk) >= chunk_rows:
+                table.add_columns(list(zip(*chunk)))
+                chunk = []
+                if progress is not None:
+                    progress(min(1.0, read[0] / size))
+        if chunk:
+            table.add_columns(list(zip(*chunk)))
+    if progress is not None:
+        progress(1.0)
+    return table
+
+def _load_parquet(path, target, progress, chunk_rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("reading Parquet files needs pyarrow (pip install pyarrow)")
+    pf = pq.ParquetFile(path)
+    header = list(pf.schema_arrow.names)
+    order = _target_last(header, target)
+    table = CategoricalTable([header[j] for j in order])
+    total = pf.metadata.num_rows or 1
+    done = 0
+    for batch in pf.iter_batches(batch_size=chunk_rows, columns=table.cols):
+        for j, name in enumerate(table.cols):
+            col = pc.fill_null(batch.column(name).cast(pa.string()), "")
+            encoded = pc.dictionary_encode(pc.utf8_trim_whitespace(col))
+            table.add_codes(j, encoded.indices.to_numpy(zero_copy_only=False),
+                            encoded.dictionary.to_pylist())
+        done += batch.num_rows
+        if progress is not None:
+            progress(min(1.0, done / total))
+    if progress is not None:
+        progress(1.0)
+    return table
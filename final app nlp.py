@@ -1,31 +1,24 @@
+import time
+_T0 = time.perf_counter()  # startup clock, reported in the status bar
+import os
+import queue
+import sys
+import threading
+from itertools import islice
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
-import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer, WordNetLemmatizer
-from nltk import pos_tag
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
-from collections import defaultdict
-
-# ---------------- NLP SETUP ----------------
-def download_nltk_data():
-    try:
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-        nltk.download('averaged_perceptron_tagger', quiet=True)
-        nltk.download('wordnet', quiet=True)
-    except Exception:
-        pass
-
-download_nltk_data()
-
-stemmer = PorterStemmer()
-lemmatizer = WordNetLemmatizer()
-try:
-    stop_words = set(stopwords.words('english'))
-except LookupError:
-    stop_words = set()
+from tkinter import ttk, scrolledtext, messagebox, filedialog
+import nlp_engine
+import corpus_model
+import text_classifier
+from naive_bayes import NaiveBayesModel, LEAVE_ONE_OUT, cross_validate, predict_file, read_rows
+from dataset import CategoricalTable, load_table
+from result_view import ResultView, Lines, Grouped, Concat
+from table_view import TableView
+from canvas_render import RenderScheduler, GradientCache, mix
+from profiling import Profiler, fmt_seconds, no_stage
+from search_index import SearchIndex
+from sort_index import SortIndex, ROW_ID
+_T_IMPORTS = time.perf_counter()
 
 # ---------------- DATASETS FOR NAIVE BAYES ----------------
 datasets = {
@@ -95,49 +88,101 @@ datasets = {
     }
 }
 
-# ---------------- NAIVE BAYES (Laplace smoothing + proba) ----------------
-def naive_bayes_predict_proba(df, feature_count, inputs):
-    targets = [row[-1] for row in df]
-    classes = sorted(set(targets))
-    total = len(df)
-
-    priors = {c: (targets.count(c) + 1) / (total + len(classes)) for c in classes}
-
-    feature_values = [set() for _ in range(feature_count)]
-    for row in df:
-        for i in range(feature_count):
-            feature_values[i].add(row[i])
-
-    per_class_rows = {c: [r for r in df if r[-1] == c] for c in classes}
-    likelihoods = defaultdict(float)
-
-    for c in classes:
-        rows_c = per_class_rows[c]
-        denom = len(rows_c)
-        for i in range(feature_count):
-            values = feature_values[i]
-            V = len(values) or 1
-            for v in values:
-                count = sum(1 for r in rows_c if r[i] == v)
-                likelihoods[(c, i, v)] = (count + 1) / (denom + V)
-
-    scores = {}
-    for c in classes:
-        score = priors[c]
-        for i, v in enumerate(inputs):
-            if v == "":
-                continue
-            V = len(feature_values[i]) or 1
-            p = likelihoods.get((c, i, v), 1 / (len(per_class_rows[c]) + V))
-            score *= p
-        scores[c] = score
-
-    total_score = sum(scores.values()) or 1.0
-    return {c: scores[c] / total_score for c in classes}
-
-def naive_bayes_predict(df, features, target_col, inputs):
-    probs = naive_bayes_predict_proba(df, len(features), inputs)
-    return max(probs, key=probs.get), probs
+# stored columnar: per column, small integer codes plus the distinct values
+for _info in datasets.values():
+    _info["data"] = CategoricalTable(_info["cols"], _info["data"])
+
+def get_nb_model(dname):
+    # fit once per dataset; the fitted model is cached next to the data
+    info = datasets[dname]
+    model = info.get("model")
+    if model is None:
+        model = info["model"] = NaiveBayesModel().fit(info["data"], info["cols"])
+    return model
+
+def get_search_index(dname):
+    # preview filter index, built on first use and cached like the model
+    info = datasets[dname]
+    index = info.get("index")
+    if index is None:
+        index = info["index"] = SearchIndex(info["data"])
+    return index
+
+def get_sort_index(dname):
+    info = datasets[dname]
+    index = info.get("sort")
+    if index is None:
+        index = info["sort"] = SortIndex(info["data"])
+    return index
+
+def append_nb_rows(dname, extra, counts):
+    # extra: CategoricalTable of new rows in the dataset's column order,
+    # counts: a NaiveBayesModel fitted on just those rows. Both merge per
+    # distinct value, so this is cheap even for a large file. Keeps the
+    # data, the cached model and the search index in step
+    info = datasets[dname]
+    for j in range(len(extra.cols)):
+        info["data"].add_codes(j, extra.column(j), extra.categories[j])
+    if info.get("model") is not None:
+        info["model"].merge(counts)
+    # the filter and sort indexes are rebuilt on next use
+    info.pop("index", None)
+    info.pop("sort", None)
+
+# result table layouts: (column id, heading, width, anchor)
+PROB_COLUMNS = (("class", "Class", 160, "w"), ("prob", "Probability", 140, "center"))
+CV_COLUMNS = (("class", "Class", 120, "w"), ("precision", "Precision", 90, "center"),
+              ("recall", "Recall", 90, "center"), ("support", "Support", 80, "center"))
+CV_MODES = ("5-fold", "10-fold", "Leave-one-out")
+APPEND_CHUNK_ROWS = 65536  # rows read per step of Append rows
+
+def short_count(v):
+    if v < 1000:
+        return str(v)
+    if v < 10 ** 6:
+        return f"{v / 1000:.0f}k"
+    return f"{v / 10 ** 6:.1f}M"
+
+# ---------------- NLP OUTPUT ----------------
+def format_nlp_result(op, res):
+    # -> (lines, bulk): display lines formatted on demand for the windowed
+    # view, and the full text used when the output is small
+    if op in ("Vocabulary", "Stop Words"):
+        words = res["vocab"] if op == "Vocabulary" else res["filtered"]
+        return Grouped(words), lambda: ", ".join(words)
+    if op in ("Stemming", "Lemmatization", "POS Tagging"):
+        return Lines(res["pairs"], lambda p: f"{p[0]} → {p[1]}"), None
+    if op == "Tokenization":
+        tokens, sents = res["tokens"], res["sentences"]
+        lines = Concat(["Word Tokens:"], Grouped(tokens, fmt=repr), ["", "Sentence Tokens:"],
+                       Lines(range(len(sents)), lambda i: f"{i + 1}. {sents[i]}"))
+        bulk = lambda: (f"Word Tokens:\n{tokens}\n\nSentence Tokens:\n" +
+                        "".join(f"{i}. {s}\n" for i, s in enumerate(sents, 1)))
+        return lines, bulk
+    if op == "Bag of Words (BoW)":
+        return Lines(res["terms"], lambda t: f"{t[0]}: {t[1]}"), None
+    if op == "TF-IDF" and "docs" in res:
+        docs = res["docs"]
+        head = [f"{len(docs)} documents • top terms per document", ""]
+        return Concat(head, Lines(docs, lambda d: f"Doc {d[0]}: " +
+                                  ", ".join(f"{w} ({v:.4f})" for w, v in d[1]))), None
+    if op == "TF-IDF" and "similar" in res:
+        sim = res["similar"]
+        return Concat(Lines(res["terms"], lambda t: f"{t[0]}: {t[1]:.4f}"),
+                      ["", "Most similar documents in the model:"],
+                      Lines(sim, lambda d: f"Doc {d[0]}: {d[1]:.4f}")), None
+    if op == "TF-IDF":
+        return Lines(res["terms"], lambda t: f"{t[0]}: {t[1]:.4f}"), None
+    if op == text_classifier.CLASSIFY_OP and "labels" in res:
+        labels = res["labels"]
+        head = [f"{len(labels)} documents • predicted class", ""]
+        return Concat(head, Lines(labels, lambda d: f"Doc {d[0]}: {d[1]} ({d[2]:.1%})")), None
+    if op == text_classifier.CLASSIFY_OP:
+        return Concat([f"Predicted: {res['label']}", "", "Class probabilities:"],
+                      Lines(res["probs"], lambda p: f"{p[0]}: {p[1]:.4f}"),
+                      ["", f"Most indicative terms for {res['label']}:"],
+                      Lines(res["evidence"], lambda t: f"{t[0]}: +{t[1]:.3f}")), None
+    return [], None
 
 # ---------------- THEME (Dark + Red Sunset) ----------------
 def apply_dark_theme(root):
@@ -180,6 +225,9 @@ def apply_dark_theme(root):
     style.configure("Sidebar.TButton", background=SIDEBAR, foreground=TEXT, padding=10, borderwidth=0)
     style.map("Sidebar.TButton", background=[("active", "#0e111a")])
 
+    style.configure("TMenubutton", background=CARD, foreground=TEXT, padding=9, borderwidth=0, arrowcolor=TEXT)
+    style.map("TMenubutton", background=[("active", CARD_HI)])
+
     style.configure("TCombobox", fieldbackground=CARD, background=CARD, foreground=TEXT, arrowcolor=TEXT, padding=6)
     style.map("TCombobox", fieldbackground=[("readonly", CARD)], foreground=[("readonly", TEXT)])
 
@@ -192,6 +240,10 @@ def apply_dark_theme(root):
     style.map("Treeview", background=[("selected", ACCENT_DARK)], foreground=[("selected", TEXT)])
 
     style.configure("Status.TLabel", background="#0a0d15", foreground=MUTED, font=("Segoe UI", 9))
+    style.configure("Status.TFrame", background="#0a0d15")
+    style.configure("Status.TButton", background="#0a0d15", foreground=MUTED, padding=(8, 2),
+                    borderwidth=0, font=("Segoe UI", 9))
+    style.map("Status.TButton", background=[("active", CARD)])
 
     return {
         "BG": BG, "SIDEBAR": SIDEBAR, "CARD": CARD, "CARD_HI": CARD_HI,
@@ -239,6 +291,10 @@ class CombinedApp:
         self.root.minsize(1120, 720)
 
         self.mode = tk.StringVar(value="NLP")  # NLP / NB
+        self._job = None  # running NLP worker: {"op", "cancel", "queue", "done_status"}
+        self.tfidf_model = None  # corpus_model.CorpusModel from Save / Load model
+        self.text_classifier = None  # text_classifier.TextClassifier from the Classifier menu
+        self.profiler = Profiler()  # off until enabled in the Performance panel
 
         self._build_layout()
         self._build_sidebar()
@@ -251,6 +307,13 @@ class CombinedApp:
         self.root.bind("<Control-Return>", lambda e: self._run_action())
         self.root.bind("<F1>", lambda e: self._show_mode("NLP"))
         self.root.bind("<F2>", lambda e: self._show_mode("NB"))
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _on_close(self):
+        if self._job is not None:
+            self._job["cancel"].set()
+        nlp_engine.shutdown_pool()
+        self.root.destroy()
 
     # ----- Layout shell -----
     def _build_layout(self):
@@ -266,7 +329,8 @@ class CombinedApp:
         # Header
         self.header = tk.Canvas(self.main, height=74, highlightthickness=0, bd=0, bg=self.c["BG"])
         self.header.pack(fill="x")
-        self._draw_header()
+        self._render = RenderScheduler(self.root)
+        self._build_header()
 
         # Toolbar
         self.toolbar = ttk.Frame(self.main, style="Card.TFrame")
@@ -276,30 +340,137 @@ class CombinedApp:
         self.body = ttk.Frame(self.main)
         self.body.pack(fill="both", expand=True, padx=14, pady=(0, 12))
 
-        # Status bar
-        self.status = ttk.Label(self.root, text="", anchor="w", style="Status.TLabel")
-        self.status.pack(fill="x")
-
-    def _draw_header(self):
-        self.header.delete("all")
-        w = max(self.root.winfo_width(), 1200)
-        # gradient
-        for i in range(0, w, 4):
-            t = i / max(w, 1)
-            color = self._mix(self.c["ACCENT_SOFT"], self.c["ACCENT"], t)
-            self.header.create_rectangle(i, 0, i + 4, 74, outline="", fill=color)
+        # Status bar: messages on the left, NLTK readiness and the
+        # Performance panel toggle on the right. Packed ahead of the shell so
+        # it keeps its place when the window is small
+        self.status_bar = status_bar = ttk.Frame(self.root, style="Status.TFrame")
+        status_bar.pack(side="bottom", fill="x", before=self.shell)
+        self.perf_btn = ttk.Button(status_bar, text="⏱ Performance", style="Status.TButton",
+                                   command=self._toggle_perf_panel)
+        self.perf_btn.pack(side="right", padx=(0, 6))
+        Tooltip(self.perf_btn, "Show / hide stage timings of recent runs")
+        self.nltk_status = ttk.Label(status_bar, text="", anchor="e", style="Status.TLabel")
+        self.nltk_status.pack(side="right", padx=(0, 10))
+        self.status = ttk.Label(status_bar, text="", anchor="w", style="Status.TLabel")
+        self.status.pack(side="left", fill="x", expand=True)
+        self._build_perf_panel()
+
+    # ----- Performance panel -----
+    def _build_perf_panel(self):
+        # collapsed by default; sits between the body and the status bar
+        self.perf_panel = ttk.Frame(self.root, style="Card.TFrame")
+        self._perf_open = False
+
+        opts = ttk.Frame(self.perf_panel)
+        opts.pack(fill="x", padx=10, pady=(8, 4))
+        ttk.Label(opts, text="Performance", style="Section.TLabel").pack(side="left", padx=(0, 12))
+        self.perf_time_var = tk.BooleanVar(value=False)
+        self.perf_mem_var = tk.BooleanVar(value=False)
+        self.perf_cprof_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(opts, text="Time stages", variable=self.perf_time_var,
+                        command=lambda: self._sync_profiler("time")).pack(side="left")
+        mem_cb = ttk.Checkbutton(opts, text="Peak memory", variable=self.perf_mem_var,
+                                 command=lambda: self._sync_profiler("memory"))
+        mem_cb.pack(side="left", padx=(12, 0))
+        Tooltip(mem_cb, "tracemalloc: peak Python allocations per stage (slows runs down)")
+        cprof_cb = ttk.Checkbutton(opts, text="cProfile", variable=self.perf_cprof_var,
+                                   command=lambda: self._sync_profiler("cprofile"))
+        cprof_cb.pack(side="left", padx=(12, 0))
+        Tooltip(cprof_cb, "Capture a cProfile of each run for export (slows runs down)")
+        ttk.Button(opts, text="Clear", command=self._clear_perf_runs).pack(side="right")
+        ttk.Button(opts, text="Export profile…", command=self._export_profile).pack(side="right", padx=(0, 8))
+
+        self.perf_tree = ttk.Treeview(self.perf_panel, columns=("time", "share", "peak"),
+                                      show="tree headings", height=6)
+        self.perf_tree.heading("#0", text="Run / stage")
+        self.perf_tree.heading("time", text="Time")
+        self.perf_tree.heading("share", text="Share")
+        self.perf_tree.heading("peak", text="Peak memory")
+        self.perf_tree.column("#0", width=320, anchor="w")
+        for col in ("time", "share", "peak"):
+            self.perf_tree.column(col, width=110, anchor="e")
+        self.perf_tree.pack(fill="x", padx=10, pady=(0, 8))
+
+    def _toggle_perf_panel(self):
+        self._perf_open = not self._perf_open
+        if self._perf_open:
+            self.perf_panel.pack(side="bottom", fill="x", before=self.shell)
+        else:
+            self.perf_panel.pack_forget()
+
+    def _sync_profiler(self, changed):
+        # memory / cProfile capture only happen on timed runs
+        if changed == "time" and not self.perf_time_var.get():
+            self.perf_mem_var.set(False)
+            self.perf_cprof_var.set(False)
+        elif self.perf_mem_var.get() or self.perf_cprof_var.get():
+            self.perf_time_var.set(True)
+        self.profiler.enabled = self.perf_time_var.get()
+        self.profiler.memory = self.perf_mem_var.get()
+        self.profiler.cprofile = self.perf_cprof_var.get()
+        self._set_status("Profiling on." if self.profiler.enabled else "Profiling off.")
+
+    def _record_run(self, run):
+        # files a finished run in the panel; returns the status bar suffix
+        if run is None:
+            return ""
+        self.profiler.record(run)
+        total = run.total or 1e-12
+        mb = lambda b: "" if b is None else f"{b / 2 ** 20:.1f} MB"
+        parent = self.perf_tree.insert("", 0, text=run.name, open=True,
+                                       values=(fmt_seconds(run.total), "", mb(run.peak)))
+        for name, seconds, peak in run.stages:
+            self.perf_tree.insert(parent, "end", text=name,
+                                  values=(fmt_seconds(seconds), f"{100 * seconds / total:.0f}%", mb(peak)))
+        for item in self.perf_tree.get_children()[len(self.profiler.runs):]:
+            self.perf_tree.delete(item)
+        for item in self.perf_tree.get_children()[1:]:
+            self.perf_tree.item(item, open=False)
+        self.perf_btn.config(text=f"⏱ {fmt_seconds(run.total)}")
+        return "  •  " + run.summary()
+
+    def _clear_perf_runs(self):
+        self.profiler.runs.clear()
+        self.perf_tree.delete(*self.perf_tree.get_children())
+        self.perf_btn.config(text="⏱ Performance")
+
+    def _export_profile(self):
+        run = self.profiler.last_capture()
+        if run is None:
+            messagebox.showinfo("Export profile", "Tick “cProfile” and run an operation first.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export cProfile capture", defaultextension=".prof",
+            filetypes=[("cProfile data", "*.prof"), ("Text report", "*.txt"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            run.export(path)
+        except OSError as e:
+            messagebox.showerror("Export profile", f"Could not write {path}:\n{e}")
+            return
+        self._set_status(f"Exported profile of “{run.name}” → {path}")
+
+    def _build_header(self):
+        # items are created once; resizes go through the render scheduler and
+        # only swap the gradient image and stretch the highlight band
+        self._gradients = GradientCache(self.header, 74, self.c["ACCENT_SOFT"], self.c["ACCENT"])
+        self._header_width = None
+        self._header_img = self.header.create_image(0, 0, anchor="nw")
         # solid highlight (no alpha)
-        self.header.create_rectangle(0, 0, w, 34, outline="", fill="#e6e6e6")
+        self._header_band = self.header.create_rectangle(0, 0, 0, 34, outline="", fill="#e6e6e6")
         self.header.create_text(20, 10, anchor="nw", text="🧠  NLP & Naive Bayes",
                                 font=("Segoe UI Semibold", 18), fill="#0a0a0a")
-        self.root.bind("<Configure>", lambda e: self._draw_header())
+        self._draw_header(1200)
+        self.header.bind("<Configure>",
+                         lambda e: self._render.schedule("header", self._draw_header, e.width))
 
-    def _mix(self, c1, c2, t):
-        def h2i(h): return int(h, 16)
-        r1,g1,b1 = h2i(c1[1:3]), h2i(c1[3:5]), h2i(c1[5:7])
-        r2,g2,b2 = h2i(c2[1:3]), h2i(c2[3:5]), h2i(c2[5:7])
-        r = int(r1*(1-t) + r2*t); g = int(g1*(1-t) + g2*t); b = int(b1*(1-t) + b2*t)
-        return f"#{r:02x}{g:02x}{b:02x}"
+    def _draw_header(self, w):
+        if w == self._header_width:
+            return
+        self._header_width = w
+        self.header.itemconfig(self._header_img, image=self._gradients.get(w))
+        self.header.coords(self._header_band, 0, 0, w, 34)
 
     # ----- Sidebar -----
     def _build_sidebar(self):
@@ -356,13 +527,47 @@ class CombinedApp:
 
         ttk.Label(ctr, text="Operation:").pack(side="left")
         self.operation_var = tk.StringVar()
-        operations = ["Vocabulary", "Stemming", "Lemmatization", "Stop Words",
-                      "Tokenization", "POS Tagging", "Bag of Words (BoW)", "TF-IDF"]
         self.operation_dropdown = ttk.Combobox(ctr, textvariable=self.operation_var,
-                                               values=operations, state="readonly", width=30)
+                                               values=nlp_engine.OPERATIONS + [text_classifier.CLASSIFY_OP],
+                                               state="readonly", width=30)
         self.operation_dropdown.current(0)
         self.operation_dropdown.pack(side="left", padx=(8, 12))
 
+        ttk.Label(ctr, text="Workers:").pack(side="left")
+        self.workers_var = tk.IntVar(value=1)
+        workers_spin = ttk.Spinbox(ctr, from_=1, to=nlp_engine.default_workers(),
+                                   textvariable=self.workers_var, width=4, state="readonly")
+        workers_spin.pack(side="left", padx=(8, 12))
+        Tooltip(workers_spin, "Processes used for large texts (split on paragraphs)")
+
+        ttk.Label(ctr, text="Documents:").pack(side="left")
+        self.docs_var = tk.StringVar(value=nlp_engine.DOC_UNITS[0])
+        docs_dropdown = ttk.Combobox(ctr, textvariable=self.docs_var, values=nlp_engine.DOC_UNITS,
+                                     state="readonly", width=12)
+        docs_dropdown.pack(side="left", padx=(8, 12))
+        Tooltip(docs_dropdown, "TF-IDF corpus mode: each paragraph / line is a separate document")
+
+        save_btn = ttk.Button(ctr, text="Save model…", command=self.nlp_save_model)
+        save_btn.pack(side="left")
+        Tooltip(save_btn, "Fit TF-IDF on the text (split into Documents) and save vocabulary, idf and matrix")
+        load_btn = ttk.Button(ctr, text="Load model…", command=self.nlp_load_model)
+        load_btn.pack(side="left", padx=(8, 0))
+        Tooltip(load_btn, "Open a saved TF-IDF model (memory-mapped) to weight new text against")
+        unload_btn = ttk.Button(ctr, text="Unload", command=self.nlp_unload_model)
+        unload_btn.pack(side="left", padx=(8, 0))
+        Tooltip(unload_btn, "Stop using the saved / loaded TF-IDF model; TF-IDF weighs the text on its own again")
+        clf_btn = ttk.Menubutton(ctr, text="Classifier")
+        clf_menu = tk.Menu(clf_btn, tearoff=False, bg=self.c["CARD"], fg=self.c["TEXT"],
+                           activebackground=self.c["ACCENT_DARK"], activeforeground=self.c["TEXT"])
+        clf_menu.add_command(label="Train from CSV / TSV…", command=lambda: self.nlp_train_classifier(False))
+        clf_menu.add_command(label="Train from class folders…", command=lambda: self.nlp_train_classifier(True))
+        clf_menu.add_separator()
+        clf_menu.add_command(label="Load classifier…", command=self.nlp_load_classifier)
+        clf_btn["menu"] = clf_menu
+        clf_btn.pack(side="left", padx=(8, 0))
+        Tooltip(clf_btn, "Multinomial Naive Bayes on labelled text, used by the "
+                         f"'{text_classifier.CLASSIFY_OP}' operation")
+
         ttk.Label(parent, text="Enter text", style="Muted.TLabel").pack(anchor="w", padx=pad, pady=(pad, 6))
         self.text_input = scrolledtext.ScrolledText(parent, height=8, wrap=tk.WORD,
                                                     bg=self.c["CARD"], fg=self.c["TEXT"],
@@ -372,11 +577,11 @@ class CombinedApp:
         self.text_input.pack(fill="x", padx=pad)
 
         ttk.Label(parent, text="Output", style="Muted.TLabel").pack(anchor="w", padx=pad, pady=(pad, 6))
-        self.text_output = scrolledtext.ScrolledText(parent, height=14, wrap=tk.WORD,
-                                                     bg=self.c["CARD_HI"], fg=self.c["TEXT"],
-                                                     insertbackground=self.c["TEXT"], bd=0,
-                                                     highlightthickness=1, highlightbackground=self.c["BORDER"],
-                                                     font=("Consolas", 11))
+        self.text_output = ResultView(parent, height=14, wrap=tk.WORD,
+                                      bg=self.c["CARD_HI"], fg=self.c["TEXT"],
+                                      insertbackground=self.c["TEXT"], bd=0,
+                                      highlightthickness=1, highlightbackground=self.c["BORDER"],
+                                      font=("Consolas", 11))
         self.text_output.pack(fill="both", expand=True, padx=pad, pady=(0, pad))
 
     # Naive Bayes UI (with Preview + Filter + Sort + Zebra)
@@ -395,6 +600,16 @@ class CombinedApp:
         self.dataset_menu.bind("<<ComboboxSelected>>", self._load_features)
 
         ttk.Button(top, text="Predict", style="Accent.TButton", command=self.nb_predict).pack(side="left")
+        predict_file_btn = ttk.Button(top, text="Predict file…", command=self.nb_predict_file)
+        predict_file_btn.pack(side="left", padx=(8, 0))
+        Tooltip(predict_file_btn, "Score a CSV/TSV file with the selected dataset's model")
+        append_btn = ttk.Button(top, text="Append rows…", command=self.nb_append_rows)
+        append_btn.pack(side="left", padx=(8, 0))
+        Tooltip(append_btn, "Add labelled rows from a CSV/TSV file (header must name every column)")
+        load_btn = ttk.Button(top, text="Load dataset…", command=self.nb_load_dataset)
+        load_btn.pack(side="left", padx=(8, 0))
+        Tooltip(load_btn, "Import a CSV/TSV/Parquet file; a column named target/label/class "
+                          "(else the last one) is predicted")
 
         # Preview + filter
         prev_wrap = ttk.LabelFrame(parent, text="Dataset Preview", style="Card.TFrame")
@@ -408,19 +623,14 @@ class CombinedApp:
         self.filter_entry.pack(side="left", padx=(8, 12))
         ttk.Button(filter_row, text="Apply", command=self._apply_preview_filter).pack(side="left", padx=(0, 6))
         ttk.Button(filter_row, text="Reset", command=lambda: self._reset_preview_filter(clear=True)).pack(side="left")
-        Tooltip(self.filter_entry, "Type any text to filter preview rows")
-
-        prev_container = ttk.Frame(prev_wrap)
-        prev_container.pack(fill="both", expand=True, padx=10, pady=10)
+        Tooltip(self.filter_entry, "Filters as you type. Any text, or Column=Value; separate clauses with commas")
+        self._filter_after = None
+        self.filter_var.trace_add("write", lambda *_: self._schedule_preview_filter())
 
-        self.prev_tree = ttk.Treeview(prev_container, show="headings", height=9)
-        self.prev_tree.pack(side="left", fill="both", expand=True)
-
-        vsb = ttk.Scrollbar(prev_container, orient="vertical", command=self.prev_tree.yview)
-        hsb = ttk.Scrollbar(prev_container, orient="horizontal", command=self.prev_tree.xview)
-        self.prev_tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-        vsb.pack(side="right", fill="y")
-        hsb.pack(side="bottom", fill="x")
+        # windowed: only the visible rows exist as Treeview items
+        self.prev_view = TableView(prev_wrap, height=9)
+        self.prev_view.pack(fill="both", expand=True, padx=10, pady=10)
+        self.prev_tree = self.prev_view.tree
 
         # Feature selectors
         self.features_frame = ttk.Frame(parent)
@@ -430,8 +640,16 @@ class CombinedApp:
         self.result_card = ttk.Frame(parent, style="Card.TFrame")
         self.result_card.pack(fill="both", expand=True, padx=pad, pady=(6, pad))
 
-        self.result_title = ttk.Label(self.result_card, text="Result", style="Section.TLabel")
-        self.result_title.pack(anchor="w", padx=pad, pady=(pad, 6))
+        title_row = ttk.Frame(self.result_card)
+        title_row.pack(fill="x", padx=pad, pady=(pad, 6))
+        self.result_title = ttk.Label(title_row, text="Result", style="Section.TLabel")
+        self.result_title.pack(side="left")
+        self.cv_btn = ttk.Button(title_row, text="Cross-validate", command=self.nb_cross_validate)
+        self.cv_btn.pack(side="right")
+        Tooltip(self.cv_btn, "Evaluate the selected dataset's model on held-out rows")
+        self.cv_var = tk.StringVar(value=CV_MODES[0])
+        ttk.Combobox(title_row, textvariable=self.cv_var, values=CV_MODES, state="readonly",
+                     width=14).pack(side="right", padx=(0, 8))
 
         self.result_label = ttk.Label(self.result_card, text="—", font=("Segoe UI", 12, "bold"))
         self.result_label.pack(anchor="w", padx=pad)
@@ -442,19 +660,19 @@ class CombinedApp:
         area = ttk.Frame(self.result_card)
         area.pack(fill="both", expand=True, padx=pad, pady=(0, pad))
 
-        self.prob_tree = ttk.Treeview(area, columns=("class", "prob"), show="headings", height=6)
-        self.prob_tree.heading("class", text="Class")
-        self.prob_tree.heading("prob", text="Probability")
-        self.prob_tree.column("class", width=160, anchor="w")
-        self.prob_tree.column("prob", width=140, anchor="center")
+        self.prob_tree = ttk.Treeview(area, show="headings", height=6)
+        self._set_result_columns(PROB_COLUMNS)
         self.prob_tree.pack(side="left", fill="y", padx=(0, 8), pady=8)
 
         self.bars_canvas = tk.Canvas(area, height=200, width=420, bg=self.c["CARD"], highlightthickness=0)
         self.bars_canvas.pack(side="left", fill="both", expand=True, pady=8)
+        self._bar_items = []  # canvas items per class row, see _draw_prob_bars
 
-        # state for preview filtering
-        self._preview_all_rows = []
+        # state for preview filtering / sorting: rows are read from the dataset itself
+        self._preview_rows = []
         self._preview_cols = []
+        self._preview_filter_ids = None  # row ids passing the filter, None = all
+        self._sort_spec = []  # [(column, reverse)], primary first
 
     # ----- Mode switching / toolbar state -----
     def _show_mode(self, mode):
@@ -471,15 +689,19 @@ class CombinedApp:
 
     # ----- Toolbar actions -----
     def _run_action(self):
-        if self.mode.get() == "NLP":
+        if self._job is not None:
+            self._cancel_job()
+        elif self.mode.get() == "NLP":
             self.process_text()
         else:
             self.nb_predict()
 
     def _clear_action(self):
         if self.mode.get() == "NLP":
+            if self._job is not None:
+                self._cancel_job()
             self.text_input.delete("1.0", tk.END)
-            self.text_output.delete("1.0", tk.END)
+            self.text_output.clear()
         else:
             # clear selections & result
             for var in getattr(self, "feature_vars", []):
@@ -488,7 +710,7 @@ class CombinedApp:
             self.progress["value"] = 0
             for i in self.prob_tree.get_children():
                 self.prob_tree.delete(i)
-            self.bars_canvas.delete("all")
+            self._clear_prob_bars()
         self._set_status("Cleared.")
 
     # ----- Feature controls + preview populate -----
@@ -518,7 +740,7 @@ class CombinedApp:
 
             ttk.Label(cell, text=f"{f}:").grid(row=0, column=0, sticky="w")
             var = tk.StringVar()
-            values = sorted({row[i] for row in data})
+            values = sorted(data.categories[i])
             cb = ttk.Combobox(cell, textvariable=var, values=values, state="readonly", width=18)
             cb.grid(row=0, column=1, sticky="ew")
             self.feature_vars.append(var)
@@ -526,17 +748,15 @@ class CombinedApp:
         self._set_status(f"Loaded dataset: {dname}")
 
     # Build preview with zebra stripes, sorting, filtering
-    def _populate_preview(self, cols, data, max_rows=500):
+    def _populate_preview(self, cols, data):
         self._preview_cols = ["Index"] + cols
-        self._preview_all_rows = [[idx] + row for idx, row in enumerate(data[:max_rows])]
-
-        self.prev_tree.configure(columns=self._preview_cols)
+        self._preview_rows = data
+        self._preview_filter_ids = None
+        self._sort_spec = []
+        self.prev_view.show(self._preview_cols, self._preview_row, range(len(data)))
 
-        # clear existing
-        for item in self.prev_tree.get_children():
-            self.prev_tree.delete(item)
         for c in self._preview_cols:
-            self.prev_tree.heading(c, text=c, command=lambda col=c: self._sort_preview(col, False))
+            self.prev_tree.heading(c, text=c, command=lambda col=c: self._sort_preview(col))
             self.prev_tree.column(c, width=140, anchor="w")
         self.prev_tree.column("Index", width=60, anchor="center")
 
@@ -544,56 +764,62 @@ class CombinedApp:
         self.prev_tree.tag_configure("odd", background=self.c["CARD"])
         self.prev_tree.tag_configure("even", background=self.c["CARD_HI"])
 
-        for i, row in enumerate(self._preview_all_rows):
-            tag = "even" if i % 2 == 0 else "odd"
-            self.prev_tree.insert("", "end", values=row, tags=(tag,))
+    def _preview_row(self, i):
+        return [i] + self._preview_rows[i]
 
-        self._reset_preview_filter(clear=False)
+    def _sort_preview(self, col, max_keys=3):
+        # Click a header to sort by it, again to flip direction. Columns
+        # sorted on before stay on as tie-breakers (stable multi-column sort).
+        j = ROW_ID if col == "Index" else self._preview_cols.index(col) - 1
+        spec = self._sort_spec
+        if spec and spec[0][0] == j:
+            spec = [(j, not spec[0][1])] + spec[1:]
+        else:
+            spec = [(j, False)] + [k for k in spec if k[0] != j]
+        self._sort_spec = spec[:max_keys]
+        self._refresh_preview_order()
 
-    def _sort_preview(self, col, reverse):
-        # get column index
-        col_idx = self._preview_cols.index(col)
-        rows = [(self.prev_tree.set(k, col), k) for k in self.prev_tree.get_children("")]
-        try:
-            rows.sort(key=lambda t: float(t[0]) if t[0].replace('.', '', 1).isdigit() else t[0], reverse=reverse)
-        except Exception:
-            rows.sort(key=lambda t: t[0], reverse=reverse)
-        for index, (val, k) in enumerate(rows):
-            self.prev_tree.move(k, "", index)
-            # re-apply zebra after sort
-            self.prev_tree.item(k, tags=("even" if index % 2 == 0 else "odd",))
-        # toggle next sort direction
-        self.prev_tree.heading(col, text=col, command=lambda c=col: self._sort_preview(c, not reverse))
+        arrows = {k: " ▼" if reverse else " ▲" for k, reverse in self._sort_spec}
+        for pos, c in enumerate(self._preview_cols):
+            self.prev_tree.heading(c, text=c + arrows.get(ROW_ID if pos == 0 else pos - 1, ""))
+        names = [self._preview_cols[0 if k == ROW_ID else k + 1] + arrows[k] for k, _ in self._sort_spec]
+        self._set_status("Sorted by " + ", ".join(names))
+
+    def _refresh_preview_order(self):
+        dname = self.dataset_var.get()
+        if not dname:
+            return
+        order = get_sort_index(dname).order(self._sort_spec, self._preview_filter_ids)
+        self.prev_view.set_order(order)
+
+    def _schedule_preview_filter(self, delay=150):
+        # debounce: filter once typing pauses for `delay` ms
+        if self._filter_after is not None:
+            self.root.after_cancel(self._filter_after)
+        self._filter_after = self.root.after(delay, self._apply_preview_filter)
 
     def _apply_preview_filter(self):
-        needle = self.filter_var.get().strip().lower()
+        if self._filter_after is not None:
+            self.root.after_cancel(self._filter_after)
+            self._filter_after = None
+        dname = self.dataset_var.get()
+        needle = self.filter_var.get().strip()
+        if not dname:
+            return
         if not needle:
             self._reset_preview_filter(clear=False)
             self._set_status("Filter cleared.")
             return
 
-        for item in self.prev_tree.get_children():
-            self.prev_tree.delete(item)
-
-        filtered = []
-        for row in self._preview_all_rows:
-            txt = " ".join(str(x).lower() for x in row)
-            if needle in txt:
-                filtered.append(row)
-
-        for i, row in enumerate(filtered):
-            tag = "even" if i % 2 == 0 else "odd"
-            self.prev_tree.insert("", "end", values=row, tags=(tag,))
-        self._set_status(f"Filter applied: {len(filtered)} row(s)")
+        self._preview_filter_ids = get_search_index(dname).query(needle)
+        self._refresh_preview_order()
+        self._set_status(f"Filter applied: {len(self._preview_filter_ids)} row(s)")
 
     def _reset_preview_filter(self, clear=True):
         if clear:
             self.filter_var.set("")
-        for item in self.prev_tree.get_children():
-            self.prev_tree.delete(item)
-        for i, row in enumerate(self._preview_all_rows):
-            tag = "even" if i % 2 == 0 else "odd"
-            self.prev_tree.insert("", "end", values=row, tags=(tag,))
+        self._preview_filter_ids = None
+        self._refresh_preview_order()
 
     # ----- NLP processing -----
     def process_text(self):
@@ -601,41 +827,256 @@ class CombinedApp:
         if not corpus:
             messagebox.showwarning("Warning", "Please enter some text first!")
             return
-        self.text_output.delete("1.0", tk.END)
+        self.text_output.clear()
         op = self.operation_var.get()
-        tokens = word_tokenize(corpus.lower())
-
-        if op == "Vocabulary":
-            vocab = sorted(set(tokens))
-            self.text_output.insert(tk.END, ", ".join(vocab))
-        elif op == "Stemming":
-            for w in tokens:
-                self.text_output.insert(tk.END, f"{w} → {stemmer.stem(w)}\n")
-        elif op == "Lemmatization":
-            for w in tokens:
-                self.text_output.insert(tk.END, f"{w} → {lemmatizer.lemmatize(w)}\n")
-        elif op == "Stop Words":
-            filtered = [w for w in tokens if w not in stop_words]
-            self.text_output.insert(tk.END, ", ".join(filtered))
-        elif op == "Tokenization":
-            sents = sent_tokenize(corpus)
-            self.text_output.insert(tk.END, f"Word Tokens:\n{tokens}\n\nSentence Tokens:\n")
-            for i, s in enumerate(sents, 1):
-                self.text_output.insert(tk.END, f"{i}. {s}\n")
-        elif op == "POS Tagging":
-            for w, tag in pos_tag(word_tokenize(corpus)):
-                self.text_output.insert(tk.END, f"{w} → {tag}\n")
-        elif op == "Bag of Words (BoW)":
-            vec = CountVectorizer()
-            bow = vec.fit_transform([corpus])
-            for w, c in zip(vec.get_feature_names_out(), bow.toarray()[0]):
-                self.text_output.insert(tk.END, f"{w}: {c}\n")
-        elif op == "TF-IDF":
-            vec = TfidfVectorizer()
-            tfidf = vec.fit_transform([corpus])
-            for w, score in zip(vec.get_feature_names_out(), tfidf.toarray()[0]):
-                self.text_output.insert(tk.END, f"{w}: {score:.4f}\n")
-        self._set_status(f"Ran NLP op: {op}")
+        workers = self.workers_var.get()
+        docs = self.docs_var.get()
+        # a loaded model weights single-document TF-IDF with its own idf
+        model = self.tfidf_model if op == "TF-IDF" and docs == nlp_engine.DOC_UNITS[0] else None
+        classifier = self.text_classifier
+        if op == text_classifier.CLASSIFY_OP and classifier is None:
+            messagebox.showinfo("Tip", "Train or load a classifier first (Classifier menu).")
+            return
+        run = self.profiler.start(f"NLP • {op}")
+        stage = run.stage if run is not None else no_stage
+
+        def compute(progress, cancel):
+            if op == text_classifier.CLASSIFY_OP:
+                res = classifier.classify(corpus, unit=docs, progress=progress, cancel=cancel,
+                                          workers=workers, stage=stage)
+            elif model is not None:
+                res = model.query(corpus, progress=progress, cancel=cancel, workers=workers,
+                                  stage=stage)
+            else:
+                res = nlp_engine.run(op, corpus, progress=progress, cancel=cancel,
+                                     workers=workers, docs=docs, stage=stage)
+            with stage("format"):
+                return format_nlp_result(op, res)
+
+        self._start_job(op, compute, run=run)
+
+    def _start_job(self, op, compute, done_status=None, run=None):
+        # compute(progress, cancel) -> (lines, bulk) runs on a worker thread;
+        # results come back through the queue. lines None: nothing to show in
+        # the output; done_status(bulk) runs on the Tk thread and returns the
+        # status. run: profiling.Run or None
+        job = {"op": op, "cancel": threading.Event(), "queue": queue.Queue(),
+               "done_status": done_status, "run": run}
+        self._job = job
+
+        def progress(done, total):
+            # total None: size unknown, the count alone is shown
+            job["queue"].put(("progress", (done, total)))
+
+        def work():
+            try:
+                job["queue"].put(("done", compute(progress, job["cancel"])))
+            except nlp_engine.Cancelled:
+                job["queue"].put(("cancelled", None))
+            except Exception as e:
+                job["queue"].put(("error", e))
+
+        threading.Thread(target=work, daemon=True).start()
+        self.run_btn.config(text="■ Cancel (Ctrl+Enter)")
+        self._set_status(f"Running {op}…")
+        self.root.after(50, self._poll_job, job)
+
+    def _poll_job(self, job):
+        if job is not self._job:
+            return
+        latest = None
+        try:
+            while True:
+                kind, payload = job["queue"].get_nowait()
+                if kind == "progress":
+                    latest = payload
+                    continue
+                self._finish_job(job, kind, payload)
+                return
+        except queue.Empty:
+            pass
+        if latest is not None:
+            done, total = latest
+            shown = f"{int(done / total * 100)}%" if total else f"{short_count(done)} done"
+            self.run_btn.config(text=f"■ Cancel ({shown})")
+            self._set_status(f"Running {job['op']}… {shown}")
+        self.root.after(50, self._poll_job, job)
+
+    def _finish_job(self, job, kind, payload):
+        self._job = None
+        self.run_btn.config(text="▶ Run (Ctrl+Enter)")
+        op = job["op"]
+        run = job["run"]
+        if kind == "done":
+            lines, bulk = payload
+            if lines is None:
+                status = job["done_status"](bulk)
+            else:
+                stage = run.stage if run is not None else no_stage
+                with stage("render"):
+                    self.text_output.show(lines, bulk)
+                    if run is not None:
+                        self.root.update_idletasks()  # include Tk's redisplay
+                status = job["done_status"] or f"Ran NLP op: {op}{self._cache_status(op)}"
+            self._set_status(status + self._record_run(run))
+            return
+        if run is not None:
+            run.finish()
+        if kind == "cancelled":
+            self._set_status(f"Cancelled {op}.")
+        else:
+            self._set_status(f"{op} failed.")
+            messagebox.showerror("Processing Error", f"An error occurred while processing:\n{payload}")
+
+    # ----- TF-IDF model files -----
+    def nlp_save_model(self):
+        corpus = self.text_input.get("1.0", tk.END).strip()
+        if not corpus:
+            messagebox.showwarning("Warning", "Please enter some text first!")
+            return
+        if self._job is not None:
+            return
+        path = filedialog.askdirectory(title="Save TF-IDF model to folder", mustexist=False)
+        if not path:
+            return
+        unit = self.docs_var.get()
+        docs = nlp_engine.split_documents(corpus, unit)
+        workers = self.workers_var.get()
+        run = self.profiler.start("NLP • Save model")
+        stage = run.stage if run is not None else no_stage
+
+        def compute(progress, cancel):
+            nlp_engine.require("TF-IDF")
+            with stage("fit"):
+                meta = corpus_model.fit(docs, path, unit=unit, workers=workers,
+                                        progress=progress, cancel=cancel)
+            with stage("load"):
+                self.tfidf_model = corpus_model.CorpusModel.load(path)
+            return [f"Saved TF-IDF model → {path}",
+                    f"{meta['n_docs']} document(s) ({unit.lower()}), {meta['n_terms']} term(s), "
+                    f"{meta['nnz']} nonzero(s)",
+                    "", "TF-IDF on the whole text now uses this model's vocabulary and idf."], None
+
+        self.text_output.clear()
+        self._start_job("Save model", compute, done_status=f"Saved model to {path}", run=run)
+
+    def nlp_load_model(self):
+        path = filedialog.askdirectory(title="Load TF-IDF model folder", mustexist=True)
+        if not path:
+            return
+        try:
+            model = corpus_model.CorpusModel.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Load Model", f"Could not load a model from {path}:\n{e}")
+            return
+        self.tfidf_model = model
+        self._set_status(f"Loaded model: {model.n_docs} document(s), {len(model.terms)} term(s). "
+                         f"TF-IDF on the whole text now uses it.")
+
+    def nlp_unload_model(self):
+        if self.tfidf_model is None:
+            self._set_status("No TF-IDF model is loaded.")
+            return
+        self.tfidf_model = None
+        self._set_status("Unloaded TF-IDF model. TF-IDF on the whole text uses its own idf again.")
+
+    # ----- Text classifier -----
+    def nlp_train_classifier(self, folders):
+        # labelled data: a CSV / TSV with a text and a label column, or a
+        # folder with one subfolder of text files per class
+        if self._job is not None:
+            return
+        if folders:
+            src = filedialog.askdirectory(title="Folder with one subfolder per class", mustexist=True)
+        else:
+            src = filedialog.askopenfilename(
+                title="Labelled text (text and label columns)",
+                filetypes=[("CSV / TSV", "*.csv *.tsv *.tab"), ("All files", "*.*")])
+        if not src:
+            return
+        path = filedialog.askdirectory(title="Save classifier to folder", mustexist=False)
+        if not path:
+            return
+        workers = self.workers_var.get()
+        run = self.profiler.start("NLP • Train classifier")
+        stage = run.stage if run is not None else no_stage
+
+        def compute(progress, cancel):
+            nlp_engine.require("Bag of Words (BoW)")
+            with stage("fit"):
+                meta = text_classifier.fit(lambda: text_classifier.read_labelled([src]), path,
+                                           workers=workers, progress=progress, cancel=cancel)
+            with stage("load"):
+                self.text_classifier = text_classifier.TextClassifier.load(path)
+            counts = ", ".join(f"{c} ({n})" for c, n in zip(meta["classes"], meta["class_count"]))
+            return [f"Saved classifier → {path}",
+                    f"{meta['n_docs']} document(s), {meta['n_terms']} term(s)",
+                    f"Classes: {counts}",
+                    "", f"Choose '{text_classifier.CLASSIFY_OP}' to label the text; "
+                        "Documents splits it into lines or paragraphs."], None
+
+        self.text_output.clear()
+        self._start_job("Train classifier", compute, done_status=f"Saved classifier to {path}", run=run)
+
+    def nlp_load_classifier(self):
+        path = filedialog.askdirectory(title="Load classifier folder", mustexist=True)
+        if not path:
+            return
+        try:
+            model = text_classifier.TextClassifier.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Load Classifier", f"Could not load a classifier from {path}:\n{e}")
+            return
+        self.text_classifier = model
+        self._set_status(f"Loaded classifier: {len(model.classes)} classes, {len(model.terms)} term(s).")
+
+    # ----- NLTK warm-up -----
+    def start_warmup(self):
+        # Loads punkt, stopwords, the tagger and WordNet on a background
+        # thread so the first run of each operation costs the same as later ones
+        q = queue.Queue()
+        total = len(nlp_engine.RESOURCES)
+
+        def report(name, ok):
+            q.put((name, ok))
+
+        threading.Thread(target=nlp_engine.warm_up, args=(report,), daemon=True).start()
+        self.nltk_status.config(text=f"NLTK: loading 0/{total}…")
+        self.root.after(100, self._poll_warmup, q, total, [], [])
+
+    def _poll_warmup(self, q, total, done, missing):
+        try:
+            while True:
+                name, ok = q.get_nowait()
+                done.append(name)
+                if not ok:
+                    missing.append(name)
+        except queue.Empty:
+            pass
+        if len(done) < total:
+            self.nltk_status.config(text=f"NLTK: loading {len(done)}/{total}…")
+            self.root.after(100, self._poll_warmup, q, total, done, missing)
+        elif missing:
+            self.nltk_status.config(text=f"NLTK: missing {', '.join(missing)}")
+        else:
+            self.nltk_status.config(text="NLTK: ready")
+
+    @staticmethod
+    def _cache_status(op):
+        key = {"Stemming": "stem", "Lemmatization": "lemma"}.get(op)
+        if key is None:
+            return ""
+        info = nlp_engine.cache_stats()[key]
+        lookups = info.hits + info.misses
+        rate = 100.0 * info.hits / lookups if lookups else 0.0
+        return (f"  •  {key} cache: {info.hits} hits / {info.misses} misses "
+                f"({rate:.0f}%), {info.currsize} words")
+
+    def _cancel_job(self):
+        job = self._job
+        job["cancel"].set()
+        # the worker stops at its next check; stop listening to it now
+        self._finish_job(job, "cancelled", None)
 
     # ----- Prediction + bars -----
     def nb_predict(self):
@@ -644,51 +1085,274 @@ class CombinedApp:
             messagebox.showinfo("Tip", "Please select a dataset first.")
             return
 
-        data_info = datasets[dname]
-        data, cols = data_info["data"], data_info["cols"]
-        inputs = [v.get() for v in getattr(self, "feature_vars", [])]
+        run = self.profiler.start(f"NB • {dname}")
+        stage = run.stage if run is not None else no_stage
+        try:
+            with stage("fit"):  # cached after the first prediction
+                model = get_nb_model(dname)
+            cols = model.cols
+            inputs = [v.get() for v in getattr(self, "feature_vars", [])]
+
+            with stage("score"):
+                pred, probs = model.predict(inputs)
+            conf = probs[pred] * 100.0
+
+            with stage("draw"):
+                self.result_label.config(text=f"✅ Predicted {cols[-1]}: {pred}  ({conf:.1f}%)")
+                self.progress["value"] = conf
+
+                self._set_result_columns(PROB_COLUMNS)
+                for c, p in sorted(probs.items(), key=lambda x: -x[1]):
+                    self.prob_tree.insert("", "end", values=(c, f"{p*100:.1f}%"))
+
+                self._draw_prob_bars(probs, highlight=pred)
+                if run is not None:
+                    self.root.update_idletasks()
+            self._set_status(f"Predicted {pred} with {conf:.1f}% confidence." + self._record_run(run))
+        except Exception:
+            if run is not None:
+                run.finish()  # stops tracemalloc if this run started it
+            raise
+
+    def _set_result_columns(self, spec):
+        # the result table lists class probabilities or cross-validation scores
+        tree = self.prob_tree
+        tree.delete(*tree.get_children())
+        ids = [c[0] for c in spec]
+        if list(tree["columns"]) != ids:
+            tree.configure(columns=ids, displaycolumns=ids)
+            for cid, heading, width, anchor in spec:
+                tree.heading(cid, text=heading)
+                tree.column(cid, width=width, anchor=anchor)
+
+    # ----- Cross-validation -----
+    def nb_cross_validate(self):
+        dname = self.dataset_var.get()
+        if not dname:
+            messagebox.showinfo("Tip", "Please select a dataset first.")
+            return
+        if self._job is not None:
+            return
+        table = datasets[dname]["data"]
+        if len(table) < 2:
+            messagebox.showinfo("Cross-validate", "Cross-validation needs at least two rows.")
+            return
+        mode = self.cv_var.get()
+        folds = LEAVE_ONE_OUT if mode == "Leave-one-out" else int(mode.split("-")[0])
+        workers = self.workers_var.get()
+        run = self.profiler.start(f"NB • {dname} • {mode}")
+        stage = run.stage if run is not None else no_stage
+
+        def compute(progress, cancel):
+            # cross_validate checks `cancel` after every fold (or block of
+            # leave-one-out rows) and returns None once it is set
+            with stage("cross-validate"):
+                res = cross_validate(table, folds, workers=workers, progress=progress, cancel=cancel)
+            if res is None:
+                raise nlp_engine.Cancelled()
+            return None, res
+
+        def done(res):
+            with stage("draw"):
+                self._show_cv(res, mode)
+                if run is not None:
+                    self.root.update_idletasks()
+            return f"{mode} on {dname}: accuracy {res['accuracy'] * 100:.1f}%"
+
+        self._start_job(f"Cross-validation ({mode.lower()})", compute, done_status=done, run=run)
+
+    def _show_cv(self, res, mode):
+        self.result_label.config(text=f"📊 {mode}, {res['n']:,} row(s): accuracy {res['accuracy'] * 100:.1f}%")
+        self.progress["value"] = res["accuracy"] * 100
+        self._set_result_columns(CV_COLUMNS)
+        pct = lambda v: "—" if v is None else f"{v * 100:.1f}%"
+        for c in res["labels"]:
+            self.prob_tree.insert("", "end", values=(c, pct(res["precision"][c]), pct(res["recall"][c]),
+                                                     f"{res['support'][c]:,}"))
+        self._draw_confusion(res["labels"], res["confusion"])
+
+    def _draw_confusion(self, labels, confusion):
+        # confusion matrix in place of the probability bars: rows are the
+        # true class, columns the predicted one, shaded by share of the row
+        self._clear_prob_bars()
+        cv = self.bars_canvas
+        k = len(labels)
+        left, top = 96, 36
+        cell = max(2, min(40, (int(cv["height"]) - top - 8) // k, (int(cv["width"]) - left - 8) // k))
+        small = ("Segoe UI", 8)
+        cv.create_text(left + cell * k / 2, 4, anchor="n", text="predicted →",
+                       fill=self.c["MUTED"], font=small, tags="confusion")
+        named = cell >= 20
+        for i, (c, row) in enumerate(zip(labels, confusion)):
+            y = top + i * cell
+            if named:
+                cv.create_text(left - 8, y + cell / 2, anchor="e", text=str(c)[:12],
+                               fill=self.c["TEXT"], font=small, tags="confusion")
+                cv.create_text(left + i * cell + cell / 2, top - 4, anchor="s", text=str(c)[:6],
+                               fill=self.c["TEXT"], font=small, tags="confusion")
+            total = sum(row) or 1
+            for j, v in enumerate(row):
+                x = left + j * cell
+                cv.create_rectangle(x, y, x + cell - 2, y + cell - 2, outline="", tags="confusion",
+                                    fill=mix(self.c["CARD_HI"], self.c["ACCENT"], v / total))
+                if named:
+                    cv.create_text(x + cell / 2 - 1, y + cell / 2 - 1, text=short_count(v),
+                                   fill=self.c["TEXT"], font=small, tags="confusion")
+
+    def nb_predict_file(self):
+        dname = self.dataset_var.get()
+        if not dname:
+            messagebox.showinfo("Tip", "Please select a dataset first.")
+            return
+        if self._job is not None:
+            return
+        in_path = filedialog.askopenfilename(
+            title="Rows to score",
+            filetypes=[("CSV / TSV", "*.csv *.tsv *.tab"), ("All files", "*.*")])
+        if not in_path:
+            return
+        out_path = filedialog.asksaveasfilename(
+            title="Save predictions", defaultextension=".csv",
+            filetypes=[("CSV / TSV", "*.csv *.tsv *.tab"), ("All files", "*.*")])
+        if not out_path:
+            return
 
-        pred, probs = naive_bayes_predict(data, cols[:-1], cols[-1], inputs)
-        conf = probs[pred] * 100.0
+        run = self.profiler.start(f"NB • {dname} • file")
+        stage = run.stage if run is not None else no_stage
 
-        self.result_label.config(text=f"✅ Predicted {cols[-1]}: {pred}  ({conf:.1f}%)")
-        self.progress["value"] = conf
+        def compute(progress, cancel):
+            with stage("fit"):
+                model = get_nb_model(dname)
+            with stage("score file"):
+                n = predict_file(model, in_path, out_path, progress=progress, cancel=cancel)
+            return None, n
 
-        for i in self.prob_tree.get_children():
-            self.prob_tree.delete(i)
-        for c, p in sorted(probs.items(), key=lambda x: -x[1]):
-            self.prob_tree.insert("", "end", values=(c, f"{p*100:.1f}%"))
+        self._start_job("File scoring", compute, run=run,
+                        done_status=lambda n: f"Predicted {n} row(s) → {out_path}")
 
-        self._draw_prob_bars(probs, highlight=pred)
-        self._set_status(f"Predicted {pred} with {conf:.1f}% confidence.")
+    def nb_append_rows(self):
+        dname = self.dataset_var.get()
+        if not dname:
+            messagebox.showinfo("Tip", "Please select a dataset first.")
+            return
+        if self._job is not None:
+            return
+        path = filedialog.askopenfilename(
+            title="Labelled rows to append",
+            filetypes=[("CSV / TSV", "*.csv *.tsv *.tab"), ("All files", "*.*")])
+        if not path:
+            return
+        cols = datasets[dname]["cols"]
+
+        def compute(progress, cancel):
+            # the new rows are encoded and counted here, off the Tk thread and
+            # away from the live dataset; _finish_append merges them
+            extra = CategoricalTable(cols)
+            rows = read_rows(path, cols, progress=progress)
+            while True:
+                chunk = list(islice(rows, APPEND_CHUNK_ROWS))
+                if not chunk:
+                    break
+                extra.extend(chunk)
+                if cancel.is_set():
+                    raise nlp_engine.Cancelled()
+            return None, (extra, NaiveBayesModel().fit(extra, cols))
+
+        self._start_job("Append rows", compute,
+                        done_status=lambda res: self._finish_append(dname, *res))
+
+    def _finish_append(self, dname, extra, counts):
+        # runs on the Tk thread once the worker is done
+        if len(extra):
+            append_nb_rows(dname, extra, counts)
+            self._load_features()
+        return f"Appended {len(extra)} row(s) to {dname}"
+
+    def nb_load_dataset(self):
+        path = filedialog.askopenfilename(
+            title="Dataset to import",
+            filetypes=[("Data files", "*.csv *.tsv *.tab *.parquet *.pq"), ("All files", "*.*")])
+        if not path:
+            return
+        name = base = os.path.basename(path)
+        k = 2
+        while name in datasets:
+            name, k = f"{base} ({k})", k + 1
+        q = queue.Queue()
+
+        def work():
+            try:
+                q.put(("done", load_table(path, progress=lambda f: q.put(("progress", f)))))
+            except Exception as e:
+                q.put(("error", e))
+
+        threading.Thread(target=work, daemon=True).start()
+        self._set_status(f"Importing {name}…")
+        self.root.after(100, self._poll_dataset_import, q, name)
+
+    def _poll_dataset_import(self, q, name):
+        try:
+            while True:
+                kind, payload = q.get_nowait()
+                if kind == "progress":
+                    self._set_status(f"Importing {name}… {int(payload * 100)}%")
+                    continue
+                if kind == "error":
+                    self._set_status("Import failed.")
+                    messagebox.showerror("Import Error", f"Could not import {name}:\n{payload}")
+                    return
+                table = payload
+                datasets[name] = {"data": table, "cols": table.cols}
+                self.dataset_menu.configure(values=list(datasets.keys()))
+                self.dataset_var.set(name)
+                self._load_features()
+                self._set_status(f"Imported {name}: {len(table)} row(s), target “{table.cols[-1]}”")
+                return
+        except queue.Empty:
+            pass
+        self.root.after(100, self._poll_dataset_import, q, name)
 
     def _draw_prob_bars(self, probs, highlight=None):
-        self.bars_canvas.delete("all")
+        # one set of items per class row, reused from the last prediction and
+        # moved / relabelled in place
+        cv = self.bars_canvas
+        cv.delete("confusion")
         padding = 18
-        w = int(self.bars_canvas["width"])
+        w = int(cv["width"])
         max_w = w - 2 * padding
         y = padding
         bar_h = 26
         gap = 14
 
         ordered = sorted(probs.items(), key=lambda x: -x[1])
-        for cls, p in ordered:
-            self.bars_canvas.create_text(padding, y - 16, anchor="nw",
-                                         text=cls, fill=self.c["TEXT"], font=("Segoe UI", 10, "bold"))
-            self._round_rect(self.bars_canvas, padding, y, padding + max_w, y + bar_h,
-                             radius=10, fill=self.c["CARD_HI"], outline="")
+        items = self._bar_items
+        while len(items) > len(ordered):
+            cv.delete(*items.pop())
+        while len(items) < len(ordered):
+            items.append((
+                cv.create_text(0, 0, anchor="nw", fill=self.c["TEXT"], font=("Segoe UI", 10, "bold")),
+                self._round_rect(cv, 0, 0, 1, 1, radius=10, fill=self.c["CARD_HI"], outline=""),
+                self._round_rect(cv, 0, 0, 1, 1, radius=10, outline=""),
+                cv.create_text(0, 0, fill=self.c["TEXT"], font=("Segoe UI", 10), anchor="w"),
+            ))
+        for (label, track, bar, pct), (cls, p) in zip(items, ordered):
+            cv.coords(label, padding, y - 16)
+            cv.itemconfig(label, text=cls)
+            cv.coords(track, self._round_rect_points(padding, y, padding + max_w, y + bar_h, 10))
             fill_w = int(max_w * p)
-            fill_color = self.c["ACCENT"] if cls == highlight else self.c["ACCENT_DARK"]
-            self._round_rect(self.bars_canvas, padding, y, padding + fill_w, y + bar_h,
-                             radius=10, fill=fill_color, outline="")
-            self.bars_canvas.create_text(padding + max_w + 8, y + bar_h / 2,
-                                         text=f"{p*100:.1f}%", fill=self.c["TEXT"],
-                                         font=("Segoe UI", 10), anchor="w")
+            cv.coords(bar, self._round_rect_points(padding, y, padding + fill_w, y + bar_h, 10))
+            cv.itemconfig(bar, fill=self.c["ACCENT"] if cls == highlight else self.c["ACCENT_DARK"])
+            cv.coords(pct, padding + max_w + 8, y + bar_h / 2)
+            cv.itemconfig(pct, text=f"{p*100:.1f}%")
             y += bar_h + gap
 
+    def _clear_prob_bars(self):
+        self.bars_canvas.delete("all")
+        self._bar_items = []
+
     @staticmethod
-    def _round_rect(canvas, x1, y1, x2, y2, radius=8, **kwargs):
-        points = [
+    def _round_rect_points(x1, y1, x2, y2, radius=8):
+        return [
             x1+radius, y1,
             x2-radius, y1,
             x2, y1,
@@ -702,15 +1366,30 @@ class CombinedApp:
             x1, y1+radius,
             x1, y1
         ]
-        return canvas.create_polygon(points, smooth=True, **kwargs)
+
+    @classmethod
+    def _round_rect(cls, canvas, x1, y1, x2, y2, radius=8, **kwargs):
+        return canvas.create_polygon(cls._round_rect_points(x1, y1, x2, y2, radius), smooth=True, **kwargs)
 
     def _set_status(self, text):
         self.status.config(text="  " + text)
 
 # ---------------- RUN ----------------
 if __name__ == "__main__":
-    # Tooltip needs tk imported as Tooltip uses tk.Label; ensure here:
-    import tkinter as tk  # (already imported above, harmless)
     root = tk.Tk()
     app = CombinedApp(root)
-    root.mainloop()
+    if "--profile" in sys.argv:
+        app.perf_time_var.set(True)
+        app._sync_profiler("time")
+    t_ui = time.perf_counter()
+    root.update()  # first frame on screen
+    t_shown = time.perf_counter()
+    app._set_status(f"Ready in {t_shown - _T0:.2f}s.")
+    if "--no-warmup" not in sys.argv:
+        root.after_idle(app.start_warmup)
+    if "--startup-report" in sys.argv:
+        print(f"imports {_T_IMPORTS - _T0:.3f}s  ui {t_ui - _T_IMPORTS:.3f}s  "
+              f"first frame {t_shown - t_ui:.3f}s  total {t_shown - _T0:.3f}s")
+        root.destroy()
+    else:
+        root.mainloop()
@@ -0,0 +1,564 @@
+# ---------------- NAIVE BAYES (Laplace smoothing + proba) ----------------
+# Categorical Naive Bayes shared by the GUI. Counts are built once in fit();
+# predictions only read from the count tables.
+import argparse
+import csv
+import math
+import os
+import sys
+from collections import Counter
+
+def _numpy():
+    # numpy / scipy are only needed for batch scoring; imported on first use
+    import numpy as np
+    from scipy import sparse
+    return np, sparse
+
+class NaiveBayesModel:
+    def __init__(self):
+        self.cols = []
+        self.classes = []
+        self.class_counts = {}
+        self.total = 0
+        # per feature: value -> {class: count}
+        self.value_counts = []
+        self._compiled = None
+
+    def fit(self, data, cols):
+        self.cols = list(cols)
+        self.class_counts = {}
+        self.value_counts = [{} for _ in range(len(self.cols) - 1)]
+        self.total = 0
+        if hasattr(data, "categories"):
+            return self._fit_codes(data)
+        # one pass over the rows
+        return self.partial_fit(data)
+
+    def _fit_codes(self, table):
+        # Columnar data (dataset.CategoricalTable, columns in self.cols order):
+        # each count table is one np.bincount over (value code, class code).
+        np, _ = _numpy()
+        y = table.column(len(self.cols) - 1).astype(np.int64)
+        labels = table.categories[-1]
+        k = len(labels)
+        self.class_counts = {labels[c]: int(n) for c, n in enumerate(np.bincount(y, minlength=k)) if n}
+        for i, counts in enumerate(self.value_counts):
+            values = table.categories[i]
+            joint = np.bincount(table.column(i).astype(np.int64) * k + y,
+                                minlength=len(values) * k).reshape(len(values), k)
+            for v, c in zip(*np.nonzero(joint)):
+                counts.setdefault(values[v], {})[labels[c]] = int(joint[v, c])
+        self.total = len(table)
+        self._refresh()
+        return self
+
+    # ----- incremental updates: O(features) per row -----
+    def partial_fit(self, rows, cols=None):
+        if cols is not None and not self.cols:
+            return self.fit(rows, cols)
+        n_features = len(self.value_counts)
+        for row in rows:
+            c = row[-1]
+            self.class_counts[c] = self.class_counts.get(c, 0) + 1
+            for i in range(n_features):
+                per_class = self.value_counts[i].setdefault(row[i], {})
+                per_class[c] = per_class.get(c, 0) + 1
+            self.total += 1
+        self._refresh()
+        return self
+
+    def forget(self, rows):
+        # Inverse of partial_fit. Values and classes whose count drops to
+        # zero are dropped, so the model matches a refit without the rows.
+        # All rows are checked before any count changes: if one was never
+        # learned, ValueError is raised and the model is left as it was.
+        n_features = len(self.value_counts)
+        class_need = Counter()
+        value_need = Counter()  # (feature, value, class) -> rows to remove
+        for row in rows:
+            c = row[-1]
+            class_need[c] += 1
+            for i in range(n_features):
+                value_need[i, row[i], c] += 1
+            if (class_need[c] > self.class_counts.get(c, 0) or
+                    any(value_need[i, row[i], c] > self.value_counts[i].get(row[i], {}).get(c, 0)
+                        for i in range(n_features))):
+                raise ValueError(f"row {row!r} was never learned")
+        for c, n in class_need.items():
+            self.class_counts[c] -= n
+            if not self.class_counts[c]:
+                del self.class_counts[c]
+        for (i, v, c), n in value_need.items():
+            per_class = self.value_counts[i][v]
+            per_class[c] -= n
+            if not per_class[c]:
+                del per_class[c]
+                if not per_class:
+                    del self.value_counts[i][v]
+        self.total -= sum(class_need.values())
+        self._refresh()
+        return self
+
+    def merge(self, other):
+        # Adds the counts of `other`, a model over the same columns (e.g. one
+        # fitted on new rows): the same result as partial_fit on its rows, in
+        # time proportional to its distinct values instead of its rows.
+        for c, n in other.class_counts.items():
+            self.class_counts[c] = self.class_counts.get(c, 0) + n
+        for counts, more in zip(self.value_counts, other.value_counts):
+            for v, per_class in more.items():
+                mine = counts.setdefault(v, {})
+                for c, n in per_class.items():
+                    mine[c] = mine.get(c, 0) + n
+        self.total += other.total
+        self._refresh()
+        return self
+
+    def _refresh(self):
+        self.classes = sorted(self.class_counts)
+        self._compiled = None
+
+    @property
+    def features(self):
+        return self.cols[:-1]
+
+    def feature_values(self, i):
+        return sorted(self.value_counts[i])
+
+    def predict_log_proba(self, inputs):
+        # log P(c | x) up to a constant:
+        #   log prior_c + sum_i [log(count_ic(v) + 1) - log(n_c + V_i)]
+        # Most (value, class) counts are zero and contribute log(1) = 0, so
+        # only the stored counts of the given values are visited.
+        classes = self.classes
+        if not classes:
+            return {}
+        k = len(classes)
+        scores = {}
+        active = [i for i, v in enumerate(inputs) if v != ""]
+        sizes = [len(self.value_counts[i]) or 1 for i in active]
+        for c in classes:
+            n_c = self.class_counts[c]
+            scores[c] = (math.log((n_c + 1) / (self.total + k))
+                         - sum(math.log(n_c + V) for V in sizes))
+        for i in active:
+            for c, count in self.value_counts[i].get(inputs[i], {}).items():
+                scores[c] += math.log1p(count)
+
+        # log-sum-exp normalisation
+        top = max(scores.values())
+        log_z = top + math.log(sum(math.exp(s - top) for s in scores.values()))
+        return {c: scores[c] - log_z for c in classes}
+
+    def predict_proba(self, inputs):
+        return {c: math.exp(lp) for c, lp in self.predict_log_proba(inputs).items()}
+
+    def predict(self, inputs):
+        probs = self.predict_proba(inputs)
+        return max(probs, key=probs.get), probs
+
+    # ----- vectorized batch scoring -----
+    def _compile(self):
+        # All feature values share one code space. log1p(count) is stored in
+        # a sparse (n_codes + 1, k) matrix, so memory follows the number of
+        # observed (value, class) pairs. The last code is the all-zero row
+        # used for values never seen in training.
+        if self._compiled is not None:
+            return self._compiled
+        np, sparse = _numpy()
+        classes = self.classes
+        class_pos = {c: j for j, c in enumerate(classes)}
+        class_n = np.array([self.class_counts[c] for c in classes], dtype=np.float64)
+        log_prior = np.log((class_n + 1) / (self.total + len(classes)))
+        log_denom = np.empty((len(self.value_counts), len(classes)))
+
+        indexes = []
+        rows, cols, vals = [], [], []
+        n_codes = 0
+        for i, counts in enumerate(self.value_counts):
+            index = {}
+            for v, per_class in counts.items():
+                index[v] = n_codes
+                for c, count in per_class.items():
+                    rows.append(n_codes)
+                    cols.append(class_pos[c])
+                    vals.append(math.log1p(count))
+                n_codes += 1
+            index[""] = -1
+            indexes.append(index)
+            log_denom[i] = np.log(class_n + (len(counts) or 1))
+
+        log_counts = sparse.csr_matrix((vals, (rows, cols)), shape=(n_codes + 1, len(classes)))
+        self._compiled = (indexes, log_prior, log_denom, log_counts)
+        return self._compiled
+
+    def snapshot(self):
+        # A model for batch scoring that later partial_fit / forget calls on
+        # this one do not affect: it shares the compiled tables, which are
+        # replaced on every update rather than changed in place.
+        snap = NaiveBayesModel()
+        snap.cols = list(self.cols)
+        snap.classes = list(self.classes)
+        snap._compiled = self._compile()
+        return snap
+
+    def encode(self, rows):
+        # (n_rows, n_features) global codes; -1 marks blank inputs
+        np, _ = _numpy()
+        indexes, _, _, log_counts = self._compile()
+        unseen = log_counts.shape[0] - 1
+        columns = list(zip(*rows)) if rows else [() for _ in indexes]
+        codes = np.empty((len(rows), len(indexes)), dtype=np.int64)
+        for i, index in enumerate(indexes):
+            get = index.get
+            codes[:, i] = np.fromiter((get(v, unseen) for v in columns[i]),
+                                      dtype=np.int64, count=len(rows))
+        return codes
+
+    def predict_log_proba_batch(self, rows):
+        np, sparse = _numpy()
+        _, log_prior, log_denom, log_counts = self._compile()
+        codes = self.encode(rows)
+        active = codes >= 0
+        r, f = np.nonzero(active)
+        onehot = sparse.csr_matrix((np.ones(len(r)), (r, codes[r, f])),
+                                   shape=(len(codes), log_counts.shape[0]))
+        scores = (onehot @ log_counts).toarray()
+        scores -= active.astype(np.float64) @ log_denom
+        scores += log_prior
+        # log-sum-exp normalisation per row
+        top = scores.max(axis=1, keepdims=True)
+        scores -= top + np.log(np.exp(scores - top).sum(axis=1, keepdims=True))
+        return scores
+
+    def predict_proba_batch(self, rows):
+        # rows: sequence of feature-value rows -> (n_rows, n_classes) matrix,
+        # columns ordered like self.classes
+        np, _ = _numpy()
+        return np.exp(self.predict_log_proba_batch(rows))
+
+    def predict_batch(self, rows):
+        np, _ = _numpy()
+        probs = self.predict_proba_batch(rows)
+        labels = np.asarray(self.classes, dtype=object)[probs.argmax(axis=1)]
+        return labels, probs
+
+# ---------------- CROSS-VALIDATION ----------------
+# Stratified k-fold and leave-one-out evaluation over a columnar table
+# (dataset.CategoricalTable). The (value, class) count tables are built once
+# over all rows; each held-out block is scored against those counts minus
+# its own, which is exactly the model a refit on the other rows would give
+# (classes and values whose count drops to zero disappear, as in forget()).
+# Blocks are independent, so they are spread across worker processes.
+LEAVE_ONE_OUT = 0
+CV_BLOCK_ROWS = 1 << 18  # leave-one-out rows per task
+PARALLEL_MIN_ROWS = 200_000  # below this, process start-up costs more than it saves
+
+def cross_validate(table, folds=5, workers=1, seed=0, progress=None, cancel=None):
+    # folds: number of stratified folds, or LEAVE_ONE_OUT. progress(done,
+    # total) is called per finished block; a set `cancel` event stops early
+    # with None. Returns a dict: labels (sorted), confusion (rows = true
+    # class, columns = predicted), accuracy, precision, recall, support.
+    np, _ = _numpy()
+    n = len(table)
+    labels = sorted(table.categories[-1])
+    position = {c: j for j, c in enumerate(labels)}
+    rank = np.array([position[v] for v in table.categories[-1]], dtype=np.int64)  # code -> position
+    y = rank[table.column(len(table.cols) - 1)]
+    k = len(labels)
+    X = np.empty((n, len(table.cols) - 1), dtype=np.int32)
+    for i in range(X.shape[1]):
+        X[:, i] = table.column(i)
+    joints = [np.bincount(X[:, i] * k + y, minlength=len(cats) * k).reshape(len(cats), k)
+              for i, cats in enumerate(table.categories[:-1])]
+    class_n = np.bincount(y, minlength=k)
+    blanks = [table.code(i, "") for i in range(len(joints))]
+    blanks = [-1 if b is None else b for b in blanks]
+
+    loo = folds == LEAVE_ONE_OUT or folds >= n
+    if loo:
+        blocks = [np.arange(a, min(a + CV_BLOCK_ROWS, n)) for a in range(0, n, CV_BLOCK_ROWS)]
+    else:
+        # stratified: rows shuffled within each class, then dealt round-robin
+        rng = np.random.default_rng(seed)
+        order = np.lexsort((rng.random(n), y))
+        fold = np.empty(n, dtype=np.int64)
+        fold[order] = np.arange(n) % folds
+        by_fold = np.argsort(fold, kind="stable")
+        blocks = [b for b in np.split(by_fold, np.cumsum(np.bincount(fold, minlength=folds))[:-1]) if len(b)]
+    tasks = ((X[b], y[b], joints, class_n, blanks, loo) for b in blocks)
+
+    pred = np.empty(n, dtype=np.int64)
+    if workers > 1 and len(blocks) > 1 and n >= PARALLEL_MIN_ROWS:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(blocks)))
+        results = pool.map(_cv_block, tasks)
+    else:
+        pool = None
+        results = map(_cv_block, tasks)
+    try:
+        for done, (b, p) in enumerate(zip(blocks, results), 1):
+            pred[b] = p
+            if progress is not None:
+                progress(done, len(blocks))
+            if cancel is not None and cancel.is_set():
+                return None
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    confusion = np.bincount(y * k + pred, minlength=k * k).reshape(k, k)
+    hits = np.diag(confusion)
+    predicted = confusion.sum(axis=0)
+    support = confusion.sum(axis=1)
+    return {
+        "folds": "leave-one-out" if loo else folds, "n": n, "labels": labels,
+        "confusion": confusion.tolist(),
+        "accuracy": float(hits.sum() / n) if n else 0.0,
+        "precision": {c: (float(h / p) if p else None) for c, h, p in zip(labels, hits, predicted)},
+        "recall": {c: (float(h / s) if s else None) for c, h, s in zip(labels, hits, support)},
+        "support": dict(zip(labels, support.tolist())),
+    }
+
+def cv_report(res):
+    # cross_validate() result as text lines
+    folds = res["folds"] if isinstance(res["folds"], str) else f"{res['folds']}-fold"
+    lines = [f"{folds} cross-validation on {res['n']} row(s): accuracy {res['accuracy']:.2%}", ""]
+    pct = lambda v: "-" if v is None else f"{v:.2%}"
+    width = max(len(str(c)) for c in res["labels"] + ["class"])
+    lines.append(f"{'class':<{width}}  {'precision':>9}  {'recall':>9}  {'support':>8}")
+    for c in res["labels"]:
+        lines.append(f"{c:<{width}}  {pct(res['precision'][c]):>9}  {pct(res['recall'][c]):>9}  "
+                     f"{res['support'][c]:>8}")
+    lines += ["", "confusion (rows: true class, columns: predicted)"]
+    cell = max(width, max(len(str(v)) for row in res["confusion"] for v in row))
+    lines.append(" " * (width + 2) + "  ".join(f"{c:>{cell}}" for c in res["labels"]))
+    for c, row in zip(res["labels"], res["confusion"]):
+        lines.append(f"{c:<{width}}  " + "  ".join(f"{v:>{cell}}" for v in row))
+    return lines
+
+def _cv_block(task):
+    # Predicted class positions for one held-out block: a whole fold, or
+    # for leave-one-out a run of rows that each hold out only themselves.
+    # Same arithmetic as predict_log_proba, for every row at once: each
+    # feature adds one row of a per-value table of
+    #   log(count_ic(v) + 1) - log(n_c + V_i)
+    # with the blank value's row zeroed.
+    np, _ = _numpy()
+    X, y, joints, class_n, blanks, loo = task
+    m, k = len(y), len(class_n)
+    rows = np.arange(m)
+    if loo:
+        held = np.zeros((k, k), dtype=np.int64)  # held[c]: counts without one row of class c
+        held[np.arange(k), np.arange(k)] = 1
+        n_c = (class_n - held)[y]
+        total = class_n.sum() - 1
+    else:
+        n_c = class_n - np.bincount(y, minlength=k)
+        total = class_n.sum() - m
+    present = n_c > 0
+    scores = np.log((n_c + 1) / (total + present.sum(axis=-1, keepdims=True)))
+    scores = np.broadcast_to(scores, (m, k)).copy()
+    for i, joint in enumerate(joints):
+        x = X[:, i]
+        if loo:
+            table = np.log1p(joint)
+            contrib = table[x]
+            contrib[rows, y] = np.log(joint[x, y])  # log1p(count - 1)
+            # a value seen only in this row is not in the training vocabulary
+            n_values = np.count_nonzero(joint.sum(axis=1)) - (joint.sum(axis=1)[x] == 1)
+            contrib -= np.log(n_c + np.maximum(n_values, 1)[:, None])
+        else:
+            train = joint - np.bincount(x * k + y, minlength=joint.size).reshape(joint.shape)
+            n_values = max(np.count_nonzero(train.sum(axis=1)), 1)
+            table = np.log1p(train) - np.log(n_c + n_values)
+            contrib = table[x]
+        if blanks[i] >= 0:
+            contrib[x == blanks[i]] = 0.0
+        scores += contrib
+    scores[~np.broadcast_to(present, (m, k))] = -np.inf
+    return scores.argmax(axis=1)
+
+PROGRESS_ROWS = 65536
+
+def read_rows(source, cols=None, delimiter=None, progress=None):
+    # Yields rows from a CSV/TSV path or an open stream ("-" is stdin).
+    # With cols, the header is used to reorder fields into that order.
+    # progress(done, total), for a path, is called every PROGRESS_ROWS rows
+    # with the characters read so far and the file size.
+    if source == "-":
+        yield from _read_rows(sys.stdin, cols, delimiter or ",")
+        return
+    if delimiter is None:
+        delimiter = "\t" if str(source).lower().endswith((".tsv", ".tab")) else ","
+    size = os.path.getsize(source) or 1
+    with open(source, newline="", encoding="utf-8") as f:
+        yield from _read_rows(f, cols, delimiter, size, progress)
+
+def _read_rows(f, cols, delimiter, size=None, progress=None):
+    read = [0]
+
+    def counted(f):
+        for line in f:
+            read[0] += len(line)
+            yield line
+
+    reader = csv.reader(counted(f) if progress is not None else f, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+    if cols is None:
+        yield header
+        order = None
+    else:
+        pos = {name.strip(): j for j, name in enumerate(header)}
+        missing = [c for c in cols if c not in pos]
+        if missing:
+            raise ValueError(f"missing column(s): {', '.join(missing)}")
+        order = [pos[c] for c in cols]
+    width = len(header)
+    for n, row in enumerate(reader, 1):
+        if progress is not None and n % PROGRESS_ROWS == 0:
+            progress(min(read[0], size), size)
+        if not row:
+            continue
+        if len(row) != width:  # ragged row: pad or truncate to the header
+            row = (row + [""] * width)[:width]
+        row = [x.strip() for x in row]
+        yield row if order is None else [row[j] for j in order]
+
+def predict_file(model, in_path, out_path, chunk_size=100_000, progress=None, cancel=None):
+    # Scores a CSV/TSV file whose header names the model's feature columns.
+    # Rows are streamed in chunks; missing feature columns count as blank.
+    # out_path "-" writes to stdout. progress(done, total) is called per
+    # chunk with bytes read; a set `cancel` event stops early and returns
+    # None. A cancelled or failed run removes its partial output. Every
+    # chunk is scored against the model as it was when the call started.
+    model = model.snapshot()
+    delimiter = "\t" if in_path.lower().endswith((".tsv", ".tab")) else ","
+    size = os.path.getsize(in_path) or 1
+    with open(in_path, newline="", encoding="utf-8") as fin:
+        if out_path == "-":
+            return _predict_stream(model, fin, sys.stdout, delimiter, chunk_size, size, progress, cancel)
+        try:
+            with open(out_path, "w", newline="", encoding="utf-8") as fout:
+                n = _predict_stream(model, fin, fout, delimiter, chunk_size, size, progress, cancel)
+        except BaseException:
+            if os.path.exists(out_path):
+                os.remove(out_path)
+            raise
+    if n is None:
+        os.remove(out_path)
+    return n
+
+def _predict_stream(model, fin, fout, delimiter, chunk_size, size, progress, cancel):
+    read = [0]
+
+    def counted(f):
+        for line in f:
+            read[0] += len(line)
+            yield line
+
+    reader = csv.reader(counted(fin), delimiter=delimiter)
+    writer = csv.writer(fout, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return 0
+    pos = {name.strip(): j for j, name in enumerate(header)}
+    picks = [pos.get(f) for f in model.features]
+    writer.writerow(header + ["predicted_" + model.cols[-1]] +
+                    [f"p({c})" for c in model.classes])
+
+    n = 0
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            n += _write_predictions(model, chunk, picks, writer)
+            chunk = []
+            if cancel is not None and cancel.is_set():
+                return None
+            if progress is not None:
+                progress(min(read[0], size), size)
+    if chunk:
+        n += _write_predictions(model, chunk, picks, writer)
+    return n
+
+def _write_predictions(model, chunk, picks, writer):
+    rows = [[row[j].strip() if j is not None and j < len(row) else "" for j in picks]
+            for row in chunk]
+    labels, probs = model.predict_batch(rows)
+    writer.writerows(row + [label] + [f"{p:.6f}" for p in prob_row]
+                     for row, label, prob_row in zip(chunk, labels, probs.tolist()))
+    return len(chunk)
+
+def naive_bayes_predict_proba(df, feature_count, inputs):
+    cols = [str(i) for i in range(feature_count)] + ["target"]
+    return NaiveBayesModel().fit(df, cols).predict_proba(inputs)
+
+def naive_bayes_predict(df, features, target_col, inputs):
+    probs = naive_bayes_predict_proba(df, len(features), inputs)
+    return max(probs, key=probs.get), probs
+
+# ---------------- CLI ----------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(
+        description="Categorical Naive Bayes over CSV/TSV files (last column is the target).")
+    ap.add_argument("train", help="labelled CSV/TSV with a header row")
+    ap.add_argument("--append", metavar="SRC",
+                    help="stream more rows from a file or '-' (stdin). Labelled rows are "
+                         "learned, rows without the target column are predicted")
+    ap.add_argument("--remove", metavar="SRC", help="forget the labelled rows in SRC")
+    ap.add_argument("--predict-file", metavar="IN", help="score every row of IN")
+    ap.add_argument("-o", "--out", default="-", help="output for --predict-file (default stdout)")
+    ap.add_argument("--cv", type=int, metavar="K",
+                    help="cross-validate on the training file: K stratified folds, 0 = leave-one-out")
+    ap.add_argument("-j", "--workers", type=int, default=1,
+                    help="worker processes for --cv (0 = one per CPU core)")
+    args = ap.parse_args(argv)
+    if args.cv is not None and (args.cv == 1 or args.cv < 0):
+        ap.error("--cv needs at least 2 folds (or 0 for leave-one-out)")
+
+    rows = read_rows(args.train)
+    cols = next(rows)
+    if args.cv is not None:
+        from dataset import CategoricalTable
+        table = CategoricalTable(cols, rows)
+        model = NaiveBayesModel().fit(table, cols)
+        res = cross_validate(table, args.cv, workers=args.workers or os.cpu_count() or 1)
+        print("\n".join(cv_report(res)))
+    else:
+        model = NaiveBayesModel().fit(rows, cols)
+    print(f"trained on {model.total} row(s), classes: {', '.join(map(str, model.classes))}",
+          file=sys.stderr)
+
+    if args.append:
+        stream = read_rows(args.append)
+        header = next(stream, None)
+        if header is not None:
+            pos = {name.strip(): j for j, name in enumerate(header)}
+            labelled = cols[-1] in pos
+            order = [pos.get(c) for c in (cols if labelled else model.features)]
+            for row in stream:
+                row = [row[j] if j is not None and j < len(row) else "" for j in order]
+                if labelled:
+                    model.partial_fit([row])
+                else:
+                    pred, probs = model.predict(row)
+                    print(f"{pred}\t{probs[pred]:.4f}", flush=True)
+            print(f"{model.total} row(s) after append", file=sys.stderr)
+
+    if args.remove:
+        try:
+            model.forget(read_rows(args.remove, cols))
+        except ValueError as e:
+            ap.error(str(e))
+        print(f"{model.total} row(s) after removal", file=sys.stderr)
+
+    if args.predict_file:
+        n = predict_file(model, args.predict_file, args.out)
+        print(f"scored {n} row(s)", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,758 @@
+# ---------------- NLP ENGINE ----------------
+# GUI-free versions of the eight text operations used by both apps.
+# Token-level operations take iterables and yield results, so they can be fed
+# one line at a time; the aggregations (vocabulary, BoW, TF-IDF) only keep one
+# entry per distinct term.
+import argparse
+import atexit
+import hashlib
+import math
+import os
+import re
+import sys
+import threading
+import zlib
+from collections import Counter, OrderedDict, deque
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import islice
+
+OPERATIONS = ["Vocabulary", "Stemming", "Lemmatization", "Stop Words",
+              "Tokenization", "POS Tagging", "Bag of Words (BoW)", "TF-IDF"]
+
+# ---------------- NLP SETUP ----------------
+# NLTK is imported on first use, so importing this module (and opening the
+# GUIs) is cheap. Nothing is downloaded implicitly: resources are checked
+# against the local NLTK data path and fetched only by download_nltk_data()
+# (`python nlp_engine.py --download`).
+NLTK_PACKAGES = ["punkt", "punkt_tab", "stopwords", "averaged_perceptron_tagger",
+                 "averaged_perceptron_tagger_eng", "wordnet"]
+
+def download_nltk_data():
+    import nltk
+    ok = True
+    for pkg in NLTK_PACKAGES:
+        try:
+            ok = nltk.download(pkg, quiet=True) and ok
+        except Exception:
+            ok = False
+    return ok
+
+class MissingResource(LookupError):
+    pass
+
+_stemmer = None
+_lemmatizer = None
+_stop_words = None
+_tagger = None
+
+def get_stemmer():
+    global _stemmer
+    if _stemmer is None:
+        from nltk.stem import PorterStemmer
+        _stemmer = PorterStemmer()
+    return _stemmer
+
+def get_lemmatizer():
+    global _lemmatizer
+    if _lemmatizer is None:
+        from nltk.stem import WordNetLemmatizer
+        lemmatizer = WordNetLemmatizer()
+        lemmatizer.lemmatize("tests")  # loads WordNet now rather than mid-run
+        _lemmatizer = lemmatizer
+    return _lemmatizer
+
+def get_stop_words():
+    global _stop_words
+    if _stop_words is None:
+        from nltk.corpus import stopwords
+        _stop_words = set(stopwords.words('english'))
+    return _stop_words
+
+def get_tagger():
+    # nltk.pos_tag builds a new PerceptronTagger (and reloads its weights) on
+    # every call, so one instance is kept per process
+    global _tagger
+    if _tagger is None:
+        from nltk.tag import PerceptronTagger
+        _tagger = PerceptronTagger()
+    return _tagger
+
+def _load_punkt():
+    from nltk.tokenize import sent_tokenize
+    sent_tokenize("Ready.")
+
+RESOURCES = {
+    "punkt": _load_punkt,
+    "stopwords": get_stop_words,
+    "tagger": get_tagger,
+    "wordnet": get_lemmatizer,
+}
+OP_RESOURCES = {
+    "Stop Words": ("punkt", "stopwords"),
+    "Lemmatization": ("punkt", "wordnet"),
+    "POS Tagging": ("punkt", "tagger"),
+}
+_loaded = set()
+# one lock per resource: a run waits only while the warm-up is loading a
+# resource that run needs, not for the others
+_load_locks = {name: threading.Lock() for name in RESOURCES}
+
+def missing_resources(names=tuple(RESOURCES)):
+    # Loads each resource from local NLTK data (never the network) and
+    # returns the names that are not installed.
+    missing = []
+    for name in names:
+        if name in _loaded:
+            continue
+        with _load_locks[name]:
+            if name in _loaded:
+                continue
+            try:
+                RESOURCES[name]()
+                _loaded.add(name)
+            except LookupError:
+                missing.append(name)
+    return missing
+
+def warm_up(report=None, cancel=None):
+    # Loads every resource up front (the GUIs call this on a background
+    # thread once the window is shown). report(name, ok) after each one.
+    missing = []
+    for name in RESOURCES:
+        if cancel is not None and cancel.is_set():
+            break
+        ok = not missing_resources((name,))
+        if not ok:
+            missing.append(name)
+        if report is not None:
+            report(name, ok)
+    return missing
+
+def require(op):
+    missing = missing_resources(OP_RESOURCES.get(op, ("punkt",)))
+    if missing:
+        raise MissingResource(
+            f"NLTK data not installed locally: {', '.join(missing)}.\n"
+            f"Run `python nlp_engine.py --download` once on a machine with network access.")
+
+# BoW / TF-IDF terms: CountVectorizer's default token pattern applied to the
+# shared word tokens, so the vectorizers need no tokenisation of their own
+_TERM_RE = re.compile(r"(?u)\b\w\w+\b")
+
+# ---------------- OPERATIONS ----------------
+def sentences(text):
+    from nltk.tokenize import sent_tokenize
+    return sent_tokenize(text)
+
+def sentence_tokens(sents):
+    # word tokens per sentence, original case
+    from nltk.tokenize import word_tokenize
+    return [word_tokenize(s, preserve_line=True) for s in sents]
+
+def lower_tokens(sent_toks):
+    return [t.lower() for sent in sent_toks for t in sent]
+
+def tokenize(text):
+    return lower_tokens(sentence_tokens(sentences(text)))
+
+def vocabulary(tokens):
+    return sorted(set(tokens))
+
+# Text is Zipfian, so most tokens repeat: each distinct word is stemmed /
+# lemmatized once per process and then served from a bounded LRU cache.
+WORD_CACHE_SIZE = 1 << 17
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def stem_word(w):
+    return get_stemmer().stem(w)
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def lemmatize_word(w):
+    return get_lemmatizer().lemmatize(w)
+
+def cache_stats():
+    # {"stem": CacheInfo, "lemma": CacheInfo} for this process
+    return {"stem": stem_word.cache_info(), "lemma": lemmatize_word.cache_info()}
+
+def stem(tokens):
+    for w in tokens:
+        yield w, stem_word(w)
+
+def lemmatize(tokens):
+    for w in tokens:
+        yield w, lemmatize_word(w)
+
+def remove_stop_words(tokens):
+    stop_words = get_stop_words()
+    for w in tokens:
+        if w not in stop_words:
+            yield w
+
+def tag_sentences(sent_toks, cancel=None):
+    tagger = get_tagger()
+    return [tagger.tag(sent) for sent in _checked(sent_toks, cancel, every=64)]
+
+def terms(tokens):
+    for t in tokens:
+        yield from _TERM_RE.findall(t)
+
+# BoW / TF-IDF results stay sparse: a 1 x |vocab| CSR row whose storage is
+# the nonzero entries only. Indexing yields (term, value) in vocabulary order
+# (like CountVectorizer); top() ranks by value with a partial selection.
+class TermVector:
+    def __init__(self, vocab, row):
+        self.vocab = vocab
+        self.row = row
+
+    @classmethod
+    def from_counts(cls, counts, dtype="int64"):
+        import numpy as np
+        from scipy import sparse
+        vocab = sorted(counts)
+        data = np.fromiter((counts[w] for w in vocab), dtype=dtype, count=len(vocab))
+        row = sparse.csr_matrix((data, np.arange(len(vocab)), [0, len(vocab)]),
+                                shape=(1, len(vocab)))
+        return cls(vocab, row)
+
+    def __len__(self):
+        return self.row.nnz
+
+    def __getitem__(self, i):
+        return self.vocab[self.row.indices[i]], self.row.data[i].item()
+
+    def items(self):
+        return zip(map(self.vocab.__getitem__, self.row.indices.tolist()), self.row.data.tolist())
+
+    def top(self, k, offset=0):
+        # (term, value) pairs ranked offset .. offset+k-1, highest value
+        # first, ties in vocabulary order. O(nnz + (offset+k) log(offset+k)).
+        import numpy as np
+        data, indices = self.row.data, self.row.indices
+        n = min(offset + k, len(data))
+        if n <= offset:
+            return []
+        pick = np.argpartition(-data, n - 1)[:n] if n < len(data) else np.arange(len(data))
+        # argpartition splits ties at the boundary arbitrarily; take every
+        # entry tied with the n-th value so the tie order below is exact
+        if n < len(data):
+            edge = data[pick].min()
+            pick = np.union1d(pick[data[pick] > edge], np.flatnonzero(data == edge))
+        order = pick[np.lexsort((indices[pick], -data[pick]))][offset:n]
+        return [(self.vocab[j], v) for j, v in zip(indices[order].tolist(), data[order].tolist())]
+
+    def ranked(self, page_size=1000):
+        return RankedTerms(self, page_size)
+
+class RankedTerms:
+    # The terms of a TermVector by descending value, one page of top() at a
+    # time, so scrolling a large vocabulary never sorts all of it
+    def __init__(self, vec, page_size=1000):
+        self.vec = vec
+        self.page_size = page_size
+        self._pages = OrderedDict()
+
+    def __len__(self):
+        return len(self.vec)
+
+    def page(self, p):
+        rows = self._pages.get(p)
+        if rows is None:
+            rows = self._pages[p] = self.vec.top(self.page_size, p * self.page_size)
+            if len(self._pages) > 8:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(p)
+        return rows
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.page(i // self.page_size)[i % self.page_size]
+
+def bag_of_words(counts):
+    return TermVector.from_counts(counts)
+
+def tf_idf(counts):
+    # The input is a single document, so idf is constant and TfidfVectorizer
+    # reduces to l2-normalised term frequency.
+    vec = TermVector.from_counts(counts, dtype="float64")
+    data = vec.row.data
+    norm = math.sqrt(float(data @ data)) or 1.0
+    data /= norm
+    return vec
+
+# ---------------- ANALYSIS ----------------
+# An Analysis holds the expensive layers of one text: sentences and their
+# word tokens (the single tokenisation pass), POS tags and term counts. Each
+# layer is computed at most once and shared by all eight operations; recent
+# analyses are cached by a hash of the text.
+# Layers are built one block (paragraph) at a time; blocks are the unit of
+# progress reporting, cancellation and parallel work.
+class Cancelled(Exception):
+    pass
+
+_BLOCK_SPLIT = re.compile(r"\n\s*\n")
+
+def split_blocks(text):
+    return [b for b in _BLOCK_SPLIT.split(text) if b.strip()]
+
+def _check(cancel):
+    if cancel is not None and cancel.is_set():
+        raise Cancelled()
+
+def _checked(items, cancel, every=4096):
+    for i, item in enumerate(items):
+        if i % every == 0:
+            _check(cancel)
+        yield item
+
+def analyze_block(item, tag=False, cancel=None):
+    # item is a block of text, or its sentence tokens when only tags are missing
+    if isinstance(item, str):
+        sents = sentences(item)
+        sent_toks = sentence_tokens(_checked(sents, cancel, every=256))
+    else:
+        sents, sent_toks = None, item
+    tags = tag_sentences(sent_toks, cancel) if tag else None
+    return sents, sent_toks, tags
+
+def analyze_blocks(tag, items):
+    # what a pool worker runs for one chunk of blocks
+    return [analyze_block(item, tag) for item in items]
+
+class Analysis:
+    def __init__(self, text):
+        self.blocks = split_blocks(text)
+        self.block_sents = None
+        self.block_tokens = None
+        self.block_tags = None
+        self._tokens = None
+        self._counts = None
+        self._results = {}
+
+    def build(self, tag=False, progress=None, cancel=None, workers=1):
+        # progress(done_blocks, total_blocks) is called as blocks complete;
+        # setting the `cancel` event raises Cancelled at the next check.
+        # With workers > 1 the blocks are fanned out to a process pool and
+        # collected in order, which gives the same layers as the serial loop.
+        tag = tag and self.block_tags is None
+        if self.block_tokens is not None and not tag:
+            return self
+        items = self.blocks if self.block_tokens is None else self.block_tokens
+
+        results = []
+        if workers > 1 and len(items) > 1:
+            chunks = list(_chunk_items(items))
+            parts = ordered_map(analyze_blocks, tag, chunks, workers, cancel=cancel)
+            for chunk, part in zip(chunks, parts):
+                results.extend(part)
+                if progress is not None:
+                    progress(len(results), len(items))
+        else:
+            for item in items:
+                _check(cancel)
+                results.append(analyze_block(item, tag, cancel))
+                if progress is not None:
+                    progress(len(results), len(items))
+
+        if self.block_tokens is None:
+            self.block_sents = [r[0] for r in results]
+            self.block_tokens = [r[1] for r in results]
+        if tag:
+            self.block_tags = [r[2] for r in results]
+        return self
+
+    @property
+    def sentences(self):
+        return [s for block in self.block_sents for s in block]
+
+    @property
+    def sent_tokens(self):
+        return [sent for block in self.block_tokens for sent in block]
+
+    @property
+    def tokens(self):
+        # lowercased word tokens
+        if self._tokens is None:
+            self._tokens = lower_tokens(self.sent_tokens)
+        return self._tokens
+
+    @property
+    def counts(self):
+        if self._counts is None:
+            self._counts = Counter(terms(self.tokens))
+        return self._counts
+
+    def result(self, op):
+        # result dict handed to the GUIs; requires build() first
+        res = self._results.get(op)
+        if res is None:
+            res = self._results[op] = self._compute(op)
+        return res
+
+    def _compute(self, op):
+        if op == "Vocabulary":
+            return {"vocab": vocabulary(self.tokens)}
+        if op == "Stemming":
+            return {"pairs": list(stem(self.tokens))}
+        if op == "Lemmatization":
+            return {"pairs": list(lemmatize(self.tokens))}
+        if op == "Stop Words":
+            return {"n_tokens": len(self.tokens), "filtered": list(remove_stop_words(self.tokens))}
+        if op == "Tokenization":
+            return {"tokens": self.tokens, "sentences": self.sentences}
+        if op == "POS Tagging":
+            return {"pairs": [p for block in self.block_tags for sent in block for p in sent]}
+        if op == "Bag of Words (BoW)":
+            return {"terms": bag_of_words(self.counts)}
+        if op == "TF-IDF":
+            return {"terms": tf_idf(self.counts)}
+        raise ValueError(f"unknown operation: {op}")
+
+ANALYSIS_CACHE_SIZE = 4
+_analyses = OrderedDict()
+_analyses_lock = threading.Lock()
+
+def clear_caches():
+    # drops this process's analyses and word caches (benchmarks call it to
+    # time cold runs); pool workers keep theirs until the pool is replaced
+    with _analyses_lock:
+        _analyses.clear()
+    stem_word.cache_clear()
+    lemmatize_word.cache_clear()
+
+def text_key(text):
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+def analysis(text):
+    key = text_key(text)
+    with _analyses_lock:
+        an = _analyses.get(key)
+        if an is None:
+            an = _analyses[key] = Analysis(text)
+        _analyses.move_to_end(key)
+        while len(_analyses) > ANALYSIS_CACHE_SIZE:
+            _analyses.popitem(last=False)
+    return an
+
+# name of the last stage of each operation, for run(stage=...)
+OP_STAGES = {"Vocabulary": "vocabulary", "Stemming": "stem", "Lemmatization": "lemmatize",
+             "Stop Words": "stop words", "Tokenization": "collect", "POS Tagging": "collect",
+             "Bag of Words (BoW)": "vectorize", "TF-IDF": "vectorize"}
+
+def run(op, text, progress=None, cancel=None, workers=1, docs="Whole text", stage=None):
+    # docs: one of DOC_UNITS; anything but "Whole text" runs TF-IDF in
+    # corpus mode and returns the top terms of each document.
+    # stage(name) -> context manager, entered around each pipeline stage
+    # (tokenize, tag, then OP_STAGES[op]); see profiling.Run.stage
+    if op not in OPERATIONS:
+        raise ValueError(f"unknown operation: {op}")
+    require(op)
+    stage = stage or (lambda name: nullcontext())
+    if op == "TF-IDF" and docs != "Whole text":
+        with stage("vectorize"):
+            return {"docs": list(corpus_tf_idf(split_documents(text, docs), progress=progress,
+                                               cancel=cancel, workers=workers))}
+    an = analysis(text)
+    with stage("tokenize"):
+        an.build(progress=progress, cancel=cancel, workers=workers)
+    if op == "POS Tagging":
+        with stage("tag"):
+            an.build(tag=True, progress=progress, cancel=cancel, workers=workers)
+    with stage(OP_STAGES[op]):
+        return an.result(op)
+
+# ---------------- PROCESS POOL ----------------
+_pool = None  # (workers, ProcessPoolExecutor); replaced when the size changes
+_pool_lock = threading.Lock()
+
+def default_workers():
+    return os.cpu_count() or 1
+
+def _get_pool(workers):
+    # One pool per process. Asking for a different size shuts the old pool
+    # down, so changing the GUI's Workers setting does not leave idle
+    # processes behind.
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool[0] == workers:
+            return _pool[1]
+        if _pool is not None:
+            _pool[1].shutdown(wait=False, cancel_futures=True)
+        from concurrent.futures import ProcessPoolExecutor
+        _pool = (workers, ProcessPoolExecutor(max_workers=workers))
+        return _pool[1]
+
+def shutdown_pool():
+    # stops the worker processes; the next parallel run starts a new pool
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool[1].shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+atexit.register(shutdown_pool)
+
+def _chunk_items(items, chunk_chars=256 * 1024):
+    # group consecutive blocks into ~chunk_chars units of work
+    chunk, size = [], 0
+    for item in items:
+        chunk.append(item)
+        size += len(item) if isinstance(item, str) else 6 * sum(map(len, item))
+        if size >= chunk_chars:
+            yield chunk
+            chunk, size = [], 0
+    if chunk:
+        yield chunk
+
+def ordered_map(fn, arg, items, workers, cancel=None):
+    # Yields fn(arg, item) for every item, in input order. At most
+    # 2 * workers items are in flight, so results never pile up in memory.
+    pool = _get_pool(workers)
+    pending = deque()
+    items = iter(items)
+    try:
+        for item in items:
+            pending.append(pool.submit(fn, arg, item))
+            if len(pending) >= 2 * workers:
+                _check(cancel)
+                yield pending.popleft().result()
+        while pending:
+            _check(cancel)
+            yield pending.popleft().result()
+    finally:
+        for f in pending:
+            f.cancel()
+
+# ---------------- STREAMING ----------------
+AGGREGATES = ("Vocabulary", "Bag of Words (BoW)", "TF-IDF")
+
+def stream_lines(op, lines):
+    # output lines for the per-token operations, or a partial (vocabulary
+    # set / term counter) for the aggregations
+    if op not in OPERATIONS:
+        raise ValueError(f"unknown operation: {op}")
+    out = []
+    acc = set() if op == "Vocabulary" else Counter()
+    for line in lines:
+        an = Analysis(line).build(tag=(op == "POS Tagging"))
+        if op == "Vocabulary":
+            acc.update(an.tokens)
+        elif op in AGGREGATES:
+            acc.update(an.counts)
+        elif op == "Stop Words":
+            out.extend(an.result(op)["filtered"])
+        elif op == "Tokenization":
+            out.extend(" ".join(t.lower() for t in sent) for sent in an.sent_tokens)
+        else:
+            out.extend(f"{w} → {v}" for w, v in an.result(op)["pairs"])
+    return acc if op in AGGREGATES else out
+
+def stream(op, lines, workers=1, chunk_lines=2000, top=None):
+    # Yields output lines for `op` over an iterable of input lines.
+    # Per-token operations write as they go; aggregations write at the end.
+    # top=k limits BoW / TF-IDF to the k highest-scoring terms.
+    if workers > 1:
+        chunks = iter(lambda: list(islice(lines, chunk_lines)), [])
+        results = ordered_map(stream_lines, op, chunks, workers)
+    else:
+        results = (stream_lines(op, [line]) for line in lines)
+
+    if op not in AGGREGATES:
+        for out in results:
+            yield from out
+        return
+    acc = set() if op == "Vocabulary" else Counter()
+    for part in results:
+        acc.update(part)
+    if op == "Vocabulary":
+        yield from sorted(acc)
+        return
+    vec = bag_of_words(acc) if op == "Bag of Words (BoW)" else tf_idf(acc)
+    pairs = vec.items() if top is None else vec.top(top)
+    fmt = "{}: {}" if op == "Bag of Words (BoW)" else "{}: {:.4f}"
+    for w, v in pairs:
+        yield fmt.format(w, v)
+
+# ---------------- CORPUS TF-IDF ----------------
+# Corpus mode treats every paragraph, line or file as its own document, so
+# idf is real. Document frequencies live in a fixed-size table indexed by a
+# crc32 hash of the term (stable across processes), so memory does not grow
+# with the corpus vocabulary. Two passes: the first counts document
+# frequencies, the second weights each document's own terms.
+DOC_UNITS = ("Whole text", "Paragraphs", "Lines")
+HASH_FEATURES = 1 << 20
+
+def split_documents(text, unit):
+    if unit == "Paragraphs":
+        return split_blocks(text)
+    if unit == "Lines":
+        return [line for line in text.splitlines() if line.strip()]
+    return [text] if text.strip() else []
+
+def doc_counts(doc):
+    return Analysis(doc).build().counts
+
+def doc_counts_chunk(_, docs):
+    # what a pool worker runs for one chunk of documents
+    return [doc_counts(d) for d in docs]
+
+def _iter_doc_counts(docs, workers, cancel):
+    if workers > 1:
+        for part in ordered_map(doc_counts_chunk, None, _chunk_items(docs), workers, cancel):
+            yield from part
+    else:
+        for doc in docs:
+            _check(cancel)
+            yield doc_counts(doc)
+
+class DocumentFrequencies:
+    def __init__(self, n_features=HASH_FEATURES):
+        import numpy as np
+        self.df = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+
+    def buckets(self, words):
+        import numpy as np
+        codes = np.fromiter((zlib.crc32(w.encode("utf-8", "surrogatepass")) for w in words),
+                            dtype=np.int64, count=len(words))
+        return codes % len(self.df)
+
+    def add(self, counts):
+        import numpy as np
+        # unique: two terms of one document may share a bucket
+        self.df[np.unique(self.buckets(list(counts)))] += 1
+        self.n_docs += 1
+
+    def idf(self, words):
+        # smooth idf, as TfidfVectorizer: ln((1 + n) / (1 + df)) + 1
+        import numpy as np
+        return np.log((1 + self.n_docs) / (1 + self.df[self.buckets(words)])) + 1
+
+    def vector(self, counts):
+        # l2-normalised tf-idf of one document
+        vec = TermVector.from_counts(counts, dtype="float64")
+        data = vec.row.data
+        data *= self.idf(vec.vocab)
+        norm = math.sqrt(float(data @ data)) or 1.0
+        data /= norm
+        return vec
+
+def corpus_tf_idf(docs, top=10, workers=1, progress=None, cancel=None, n_features=HASH_FEATURES):
+    # docs: a list of documents, or a zero-arg callable returning a fresh
+    # iterable of them (called once per pass, for corpora read from disk).
+    # Yields (document number, its top (term, tf-idf) pairs). Only a list
+    # keeps its term counts between the passes; a callable is re-tokenised.
+    if isinstance(docs, list):
+        source, kept = (lambda: docs), []
+        total = len(docs)
+    else:
+        source, kept = docs, None
+        total = None
+    dfs = DocumentFrequencies(n_features)
+    for counts in _iter_doc_counts(source(), workers, cancel):
+        dfs.add(counts)
+        if kept is not None:
+            kept.append(counts)
+        if progress is not None and total:
+            progress(dfs.n_docs, total)
+    for i, counts in enumerate(kept if kept is not None else
+                               _iter_doc_counts(source(), workers, cancel), 1):
+        if i % 256 == 0:
+            _check(cancel)
+        yield i, dfs.vector(counts).top(top)
+
+# ---------------- CLI ----------------
+CLI_NAMES = {
+    "vocabulary": "Vocabulary", "stem": "Stemming", "lemma": "Lemmatization",
+    "stopwords": "Stop Words", "tokens": "Tokenization", "pos": "POS Tagging",
+    "bow": "Bag of Words (BoW)", "tfidf": "TF-IDF",
+}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run an NLP operation over a text file, line by line.")
+    ap.add_argument("op", nargs="?", choices=sorted(CLI_NAMES))
+    ap.add_argument("inputs", nargs="*", metavar="input", help="text file(s) (default: stdin)")
+    ap.add_argument("-o", "--out", default="-", help="output file (default: stdout)")
+    ap.add_argument("-j", "--workers", type=int, default=1,
+                    help="worker processes (0 = one per CPU core)")
+    ap.add_argument("-k", "--top", type=int, metavar="K",
+                    help="bow/tfidf: only the K highest-scoring terms, best first")
+    ap.add_argument("--docs", choices=["text", "paragraphs", "lines", "files"], default="text",
+                    help="tfidf: treat each paragraph / line / input file as a document "
+                         "(corpus mode, top terms per document); default: one document")
+    ap.add_argument("--download", action="store_true",
+                    help="download the NLTK data this tool needs, then exit")
+    ap.add_argument("--check", action="store_true",
+                    help="report NLTK data missing from the local data path, then exit")
+    args = ap.parse_intermixed_args(argv)
+    workers = args.workers or default_workers()
+
+    if args.download:
+        return 0 if download_nltk_data() else 1
+    if args.check:
+        missing = missing_resources()
+        print("missing: " + ", ".join(missing) if missing else "all NLTK resources found")
+        return 1 if missing else 0
+    if args.op is None:
+        ap.error("an operation is required")
+    inputs = args.inputs or ["-"]
+    if args.docs != "text":
+        if args.op != "tfidf":
+            ap.error("--docs only applies to tfidf")
+        if "-" in inputs:
+            ap.error("corpus mode reads its input twice; pass file paths, not stdin")
+    try:
+        require(CLI_NAMES[args.op])
+    except MissingResource as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    fout = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        if args.docs != "text":
+            docs = lambda: read_documents(inputs, args.docs)
+            for i, pairs in corpus_tf_idf(docs, top=args.top or 10, workers=workers):
+                fout.write(f"{i}\t" + " ".join(f"{w}:{v:.4f}" for w, v in pairs) + "\n")
+        else:
+            lines = (line for line in read_lines(inputs) if line.strip())
+            for out_line in stream(CLI_NAMES[args.op], lines, workers=workers, top=args.top):
+                fout.write(out_line + "\n")
+    finally:
+        if fout is not sys.stdout:
+            fout.close()
+    return 0
+
+def read_lines(paths):
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            yield from f
+
+def read_documents(paths, unit):
+    # streams documents from disk: whole files, lines, or blank-line
+    # separated paragraphs
+    if unit == "files":
+        for path in paths:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                yield f.read()
+        return
+    for path in paths:
+        para = []
+        for line in read_lines([path]):
+            if unit == "lines":
+                if line.strip():
+                    yield line
+            elif line.strip():
+                para.append(line)
+            elif para:
+                yield "".join(para)
+                para = []
+        if para:
+            yield "".join(para)
+
+if __name__ == "__main__":
+    sys.exit(main())
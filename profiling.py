@@ -0,0 +1,156 @@
+# ---------------- PROFILING ----------------
+# Opt-in instrumentation for the GUI. A Profiler hands out one Run per user
+# action; the code doing the work wraps each stage in `with run.stage(name):`
+# and the run records its wall time, optionally the peak memory allocated
+# during it (tracemalloc) and a cProfile capture. Both extras slow the
+# stages they measure, so they are enabled separately from the timings.
+# Work done in worker processes shows up only as the time its stage waited,
+# and tracemalloc / cProfile see this process alone.
+# tracemalloc is process-wide: it runs while any memory run is open, and a
+# stage's peak is only measured while no other memory run is open (resetting
+# the peak would spoil the other run's figure), else it is left blank.
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+HISTORY = 20
+
+_memory_runs = 0  # open Runs with memory=True
+_own_trace = False  # tracemalloc was started by a Run, not by someone else
+_trace_lock = threading.Lock()
+
+def _trace_start():
+    global _memory_runs, _own_trace
+    with _trace_lock:
+        if _memory_runs == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _own_trace = True
+        _memory_runs += 1
+
+def _trace_stop():
+    global _memory_runs, _own_trace
+    with _trace_lock:
+        _memory_runs -= 1
+        if _memory_runs == 0 and _own_trace:
+            tracemalloc.stop()
+            _own_trace = False
+
+def _trace_alone():
+    return _memory_runs == 1 and tracemalloc.is_tracing()
+
+def no_stage(name):
+    # stage() stand-in for code that is not being profiled
+    return nullcontext()
+
+def fmt_seconds(s):
+    if s < 1e-3:
+        return f"{s * 1e6:.0f} µs"
+    if s < 1:
+        return f"{s * 1e3:.1f} ms"
+    return f"{s:.2f} s"
+
+class Run:
+    # Call finish() (or use the run as a context manager) on every path,
+    # including errors: a memory run keeps tracemalloc on until it finishes.
+    def __init__(self, name, memory=False, cprofile=False):
+        self.name = name
+        self.stages = []  # (stage, seconds, peak bytes or None), in order
+        self.peak = None
+        self.profile = cProfile.Profile() if cprofile else None
+        self.memory = memory
+        self._open = True
+        if memory:
+            _trace_start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finish()
+
+    @contextmanager
+    def stage(self, name):
+        measure = self.memory and self._open and _trace_alone()
+        if measure:
+            tracemalloc.reset_peak()
+        profiling = False
+        if self.profile is not None:
+            try:
+                self.profile.enable()
+                profiling = True
+            except ValueError:  # another profiler is active (a concurrent run)
+                pass
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t
+            if profiling:
+                self.profile.disable()
+            peak = None
+            if measure and _trace_alone():
+                peak = tracemalloc.get_traced_memory()[1]
+            self.stages.append((name, seconds, peak))
+
+    @property
+    def total(self):
+        return sum(s for _, s, _ in self.stages)
+
+    def finish(self):
+        # idempotent
+        peaks = [p for _, _, p in self.stages if p is not None]
+        self.peak = max(peaks) if peaks else None
+        if self._open:
+            self._open = False
+            if self.memory:
+                _trace_stop()
+        return self
+
+    def summary(self):
+        text = " · ".join(f"{name} {fmt_seconds(s)}" for name, s, _ in self.stages)
+        if self.peak is not None:
+            text += f" · peak {self.peak / 2 ** 20:.1f} MB"
+        return text
+
+    def stats_text(self, sort="cumulative", limit=40):
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def export(self, path):
+        # .prof (pstats binary, for snakeviz / pstats) or a text report
+        if path.lower().endswith((".prof", ".pstats")):
+            self.profile.dump_stats(path)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"{self.name}: {self.summary()}\n\n")
+                f.write(self.stats_text())
+
+class Profiler:
+    def __init__(self, history=HISTORY):
+        self.enabled = False
+        self.memory = False
+        self.cprofile = False
+        self.runs = deque(maxlen=history)
+
+    def start(self, name):
+        # a Run when profiling is on, else None
+        if not self.enabled:
+            return None
+        return Run(name, memory=self.memory, cprofile=self.cprofile)
+
+    def record(self, run):
+        self.runs.append(run.finish())
+        return run
+
+    def last_capture(self):
+        # the most recent run with a cProfile capture
+        for run in reversed(self.runs):
+            if run.profile is not None:
+                return run
+        return None
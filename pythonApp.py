@@ -1,29 +1,13 @@
+import time
+_T0 = time.perf_counter()  # startup clock, reported in the status bar
+import queue
+import sys
+import threading
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import nltk
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer, WordNetLemmatizer
-from nltk import pos_tag
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
-
-# Download required NLTK data
-def download_nltk_data():
-    try:
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-        nltk.download('averaged_perceptron_tagger', quiet=True)
-        nltk.download('wordnet', quiet=True)
-        nltk.download('punkt_tab', quiet=True)
-    except:
-        pass
-
-download_nltk_data()
-
-# Initialize tools
-stemmer = PorterStemmer()
-lemmatizer = WordNetLemmatizer()
-stop_words = set(stopwords.words('english'))
+import nlp_engine
+from result_view import ResultView, Lines, Grouped, Concat
+_T_IMPORTS = time.perf_counter()
 
 # Color scheme
 COLORS = {
@@ -43,6 +27,7 @@ COLORS = {
 class NLPApp:
     def __init__(self, root):
         self.root = root
+        self._job = None  # running worker: {"op", "cancel", "queue"}
         self.root.title("NLP Text Processing Toolkit")
         self.root.geometry("900x700")
         self.root.configure(bg=COLORS["bg"])
@@ -116,12 +101,10 @@ class NLPApp:
                 bg="white").pack(side=tk.LEFT, padx=(0, 10))
         
         self.operation_var = tk.StringVar()
-        operations = ["Vocabulary", "Stemming", "Lemmatization", "Stop Words", 
-                     "Tokenization", "POS Tagging", "Bag of Words (BoW)", "TF-IDF"]
         
         self.operation_dropdown = ttk.Combobox(control_inner, 
                                               textvariable=self.operation_var,
-                                              values=operations,
+                                              values=nlp_engine.OPERATIONS,
                                               state="readonly",
                                               width=25,
                                               height=15,
@@ -164,15 +147,15 @@ class NLPApp:
                 fg="white",
                 bg=COLORS["secondary"]).pack(anchor=tk.W, padx=15, pady=8)
         
-        self.text_output = scrolledtext.ScrolledText(output_card, 
-                                                    height=12, 
-                                                    wrap=tk.WORD,
-                                                    font=("Consolas", 10),
-                                                    bg="#F8F9FA",
-                                                    relief="solid",
-                                                    bd=1,
-                                                    padx=10,
-                                                    pady=10)
+        self.text_output = ResultView(output_card, 
+                                      height=12, 
+                                      wrap=tk.WORD,
+                                      font=("Consolas", 10),
+                                      bg="#F8F9FA",
+                                      relief="solid",
+                                      bd=1,
+                                      padx=10,
+                                      pady=10)
         self.text_output.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
         
         # Status Bar
@@ -180,12 +163,37 @@ class NLPApp:
         status_bar.pack(fill=tk.X, side=tk.BOTTOM)
         status_bar.pack_propagate(False)
         
-        status_label = tk.Label(status_bar, 
-                               text="Ready • NLP Toolkit v1.0", 
-                               font=("Segoe UI", 8),
-                               fg="#BDC3C7",
-                               bg=COLORS["dark"])
-        status_label.pack(side=tk.LEFT, padx=10)
+        self.status_label = tk.Label(status_bar, 
+                                    text="Ready • NLP Toolkit v1.0", 
+                                    font=("Segoe UI", 8),
+                                    fg="#BDC3C7",
+                                    bg=COLORS["dark"])
+        self.status_label.pack(side=tk.LEFT, padx=10)
+        
+        self.nltk_label = tk.Label(status_bar, 
+                                   text="", 
+                                   font=("Segoe UI", 8),
+                                   fg="#BDC3C7",
+                                   bg=COLORS["dark"])
+        self.nltk_label.pack(side=tk.RIGHT, padx=10)
+    
+    def start_warmup(self):
+        # Preload NLTK models in the background so the first run is not slower
+        q = queue.Queue()
+        threading.Thread(target=lambda: q.put(nlp_engine.warm_up()), daemon=True).start()
+        self.nltk_label.config(text="Loading NLTK data…")
+        self.root.after(100, self.poll_warmup, q)
+    
+    def poll_warmup(self, q):
+        try:
+            missing = q.get_nowait()
+        except queue.Empty:
+            self.root.after(100, self.poll_warmup, q)
+            return
+        if missing:
+            self.nltk_label.config(text="NLTK data missing: " + ", ".join(missing))
+        else:
+            self.nltk_label.config(text="NLTK ready")
     
     def setup_styles(self):
         style = ttk.Style()
@@ -205,6 +213,11 @@ class NLPApp:
                  selectforeground=[('readonly', 'white')])
     
     def process_text(self):
+        # The button doubles as Cancel while a run is in progress
+        if self._job is not None:
+            self.cancel_job()
+            return
+        
         corpus = self.text_input.get("1.0", tk.END).strip()
         
         if not corpus:
@@ -212,103 +225,139 @@ class NLPApp:
             return
         
         operation = self.operation_var.get()
-        self.text_output.delete("1.0", tk.END)
+        self.text_output.clear()
+        job = {"op": operation, "cancel": threading.Event(), "queue": queue.Queue()}
+        self._job = job
         
+        def progress(done, total):
+            job["queue"].put(("progress", done / total if total else 0.0))
+        
+        def work():
+            try:
+                res = nlp_engine.run(operation, corpus, progress=progress, cancel=job["cancel"])
+                job["queue"].put(("done", format_result(operation, res)))
+            except nlp_engine.Cancelled:
+                job["queue"].put(("cancelled", None))
+            except Exception as e:
+                job["queue"].put(("error", e))
+        
+        threading.Thread(target=work, daemon=True).start()
+        self.process_button.config(text="■ Cancel")
+        self.status_label.config(text=f"Running {operation}…")
+        self.root.after(50, self.poll_job, job)
+    
+    def poll_job(self, job):
+        if job is not self._job:
+            return
+        frac = None
         try:
-            # Tokenize text
-            tokens = word_tokenize(corpus.lower())
-            
-            if operation == "Vocabulary":
-                vocab = sorted(set(tokens))
-                result = f"📚 Total unique words: {len(vocab)}\n"
-                result += "─" * 50 + "\n\n"
-                result += ", ".join(vocab)
-                self.text_output.insert(tk.END, result)
-            
-            elif operation == "Stemming":
-                result = "🔤 Stemming Results\n"
-                result += "─" * 50 + "\n"
-                result += "Original → Stemmed\n" + "─" * 30 + "\n"
-                for word in tokens:
-                    stemmed = stemmer.stem(word)
-                    result += f"{word:15} → {stemmed}\n"
-                self.text_output.insert(tk.END, result)
-            
-            elif operation == "Lemmatization":
-                result = "🌿 Lemmatization Results\n"
-                result += "─" * 50 + "\n"
-                result += "Original → Lemmatized\n" + "─" * 30 + "\n"
-                for word in tokens:
-                    lemmatized = lemmatizer.lemmatize(word)
-                    result += f"{word:15} → {lemmatized}\n"
-                self.text_output.insert(tk.END, result)
-            
-            elif operation == "Stop Words":
-                filtered = [word for word in tokens if word not in stop_words]
-                result = "🚫 Stop Words Removal\n"
-                result += "─" * 50 + "\n"
-                result += f"Original tokens: {len(tokens)}\n"
-                result += f"After removing stop words: {len(filtered)}\n"
-                result += f"Stop words removed: {len(tokens) - len(filtered)}\n\n"
-                result += "Filtered text:\n" + "─" * 30 + "\n"
-                result += ", ".join(filtered)
-                self.text_output.insert(tk.END, result)
-            
-            elif operation == "Tokenization":
-                result = "✂️ Tokenization Results\n"
-                result += "─" * 50 + "\n"
-                result += "WORD TOKENS:\n" + "─" * 30 + "\n"
-                result += ", ".join(tokens)
-                result += f"\n\nTotal word tokens: {len(tokens)}\n\n"
-                
-                sentences = sent_tokenize(corpus)
-                result += "SENTENCE TOKENS:\n" + "─" * 30 + "\n"
-                for i, sent in enumerate(sentences, 1):
-                    result += f"{i:2}. {sent}\n"
-                self.text_output.insert(tk.END, result)
-            
-            elif operation == "POS Tagging":
-                pos_tags = pos_tag(word_tokenize(corpus))
-                result = "🏷️ Part-of-Speech Tagging\n"
-                result += "─" * 50 + "\n"
-                result += "Word → POS Tag\n" + "─" * 30 + "\n"
-                for word, tag in pos_tags:
-                    result += f"{word:15} → {tag}\n"
-                self.text_output.insert(tk.END, result)
-            
-            elif operation == "Bag of Words (BoW)":
-                vectorizer = CountVectorizer()
-                bow = vectorizer.fit_transform([corpus])
-                feature_names = vectorizer.get_feature_names_out()
-                
-                result = "🎒 Bag of Words (Word Frequencies)\n"
-                result += "─" * 50 + "\n"
-                word_freq = list(zip(feature_names, bow.toarray()[0]))
-                word_freq.sort(key=lambda x: x[1], reverse=True)
-                
-                for word, count in word_freq:
-                    result += f"{word:15} : {count:2}\n"
-                self.text_output.insert(tk.END, result)
-            
-            elif operation == "TF-IDF":
-                vectorizer = TfidfVectorizer()
-                tfidf = vectorizer.fit_transform([corpus])
-                feature_names = vectorizer.get_feature_names_out()
-                
-                result = "📈 TF-IDF Scores\n"
-                result += "─" * 50 + "\n"
-                word_scores = list(zip(feature_names, tfidf.toarray()[0]))
-                word_scores.sort(key=lambda x: x[1], reverse=True)
-                
-                for word, score in word_scores:
-                    result += f"{word:15} : {score:.4f}\n"
-                self.text_output.insert(tk.END, result)
-        
-        except Exception as e:
-            messagebox.showerror("Processing Error", f"An error occurred while processing:\n{str(e)}")
+            while True:
+                kind, payload = job["queue"].get_nowait()
+                if kind == "progress":
+                    frac = payload
+                    continue
+                self.finish_job(job, kind, payload)
+                return
+        except queue.Empty:
+            pass
+        if frac is not None:
+            pct = int(frac * 100)
+            self.process_button.config(text=f"■ Cancel ({pct}%)")
+            self.status_label.config(text=f"Running {job['op']}… {pct}%")
+        self.root.after(50, self.poll_job, job)
+    
+    def finish_job(self, job, kind, payload):
+        self._job = None
+        self.process_button.config(text="🚀 Process Text")
+        op = job["op"]
+        if kind == "done":
+            lines, bulk = payload
+            self.text_output.show(lines, bulk)
+            self.status_label.config(text=f"Done: {op} • NLP Toolkit v1.0")
+        elif kind == "cancelled":
+            self.status_label.config(text=f"Cancelled {op} • NLP Toolkit v1.0")
+        else:
+            self.status_label.config(text=f"{op} failed • NLP Toolkit v1.0")
+            messagebox.showerror("Processing Error", f"An error occurred while processing:\n{str(payload)}")
+    
+    def cancel_job(self):
+        job = self._job
+        job["cancel"].set()
+        # the worker stops at its next check; stop listening to it now
+        self.finish_job(job, "cancelled", None)
+
+# Result formatting: (lines, bulk) for ResultView.show, built on the worker thread
+def format_result(op, res):
+    rule = "─" * 50
+    rule_short = "─" * 30
+    bulk = None
+    
+    if op == "Vocabulary":
+        vocab = res["vocab"]
+        head = [f"📚 Total unique words: {len(vocab)}", rule, ""]
+        lines = Concat(head, Grouped(vocab))
+        bulk = lambda: "\n".join(head) + "\n" + ", ".join(vocab)
+    
+    elif op == "Stemming":
+        head = ["🔤 Stemming Results", rule, "Original → Stemmed", rule_short]
+        lines = Concat(head, Lines(res["pairs"], lambda p: f"{p[0]:15} → {p[1]}"))
+    
+    elif op == "Lemmatization":
+        head = ["🌿 Lemmatization Results", rule, "Original → Lemmatized", rule_short]
+        lines = Concat(head, Lines(res["pairs"], lambda p: f"{p[0]:15} → {p[1]}"))
+    
+    elif op == "Stop Words":
+        filtered = res["filtered"]
+        head = ["🚫 Stop Words Removal", rule,
+                f"Original tokens: {res['n_tokens']}",
+                f"After removing stop words: {len(filtered)}",
+                f"Stop words removed: {res['n_tokens'] - len(filtered)}", "",
+                "Filtered text:", rule_short]
+        lines = Concat(head, Grouped(filtered))
+        bulk = lambda: "\n".join(head) + "\n" + ", ".join(filtered)
+    
+    elif op == "Tokenization":
+        tokens = res["tokens"]
+        sentences = res["sentences"]
+        head = ["✂️ Tokenization Results", rule, "WORD TOKENS:", rule_short]
+        middle = ["", f"Total word tokens: {len(tokens)}", "", "SENTENCE TOKENS:", rule_short]
+        numbered = Lines(range(len(sentences)), lambda i: f"{i + 1:2}. {sentences[i]}")
+        lines = Concat(head, Grouped(tokens), middle, numbered)
+        bulk = lambda: ("\n".join(head) + "\n" + ", ".join(tokens) + "\n" +
+                        "\n".join(middle) + "\n" +
+                        "\n".join(numbered[i] for i in range(len(numbered))))
+    
+    elif op == "POS Tagging":
+        head = ["🏷️ Part-of-Speech Tagging", rule, "Word → POS Tag", rule_short]
+        lines = Concat(head, Lines(res["pairs"], lambda p: f"{p[0]:15} → {p[1]}"))
+    
+    elif op == "Bag of Words (BoW)":
+        word_freq = res["terms"].ranked()  # top-k pages, nothing sorted up front
+        head = ["🎒 Bag of Words (Word Frequencies)", rule]
+        lines = Concat(head, Lines(word_freq, lambda t: f"{t[0]:15} : {t[1]:2}"))
+    
+    elif op == "TF-IDF":
+        word_scores = res["terms"].ranked()
+        head = ["📈 TF-IDF Scores", rule]
+        lines = Concat(head, Lines(word_scores, lambda t: f"{t[0]:15} : {t[1]:.4f}"))
+    
+    else:
+        return [], None
+    return lines, bulk
 
 # Run the application
 if __name__ == "__main__":
     root = tk.Tk()
     app = NLPApp(root)
-    root.mainloop()
\ No newline at end of file
+    t_ui = time.perf_counter()
+    root.update()  # first frame on screen
+    t_shown = time.perf_counter()
+    app.status_label.config(text=f"Ready in {t_shown - _T0:.2f}s • NLP Toolkit v1.0")
+    if "--no-warmup" not in sys.argv:
+        root.after_idle(app.start_warmup)
+    if "--startup-report" in sys.argv:
+        print(f"imports {_T_IMPORTS - _T0:.3f}s  ui {t_ui - _T_IMPORTS:.3f}s  "
+              f"first frame {t_shown - t_ui:.3f}s  total {t_shown - _T0:.3f}s")
+        root.destroy()
+    else:
+        root.mainloop()
\ No newline at end of file
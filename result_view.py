@@ -0,0 +1,155 @@
+# ---------------- RESULT VIEW ----------------
+# Results pane shared by both apps. Small outputs are inserted into the Text
+# widget in one call; large ones are virtualised: only the rows that fit in the
+# widget are materialised, formatted on demand from the underlying results.
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+from bisect import bisect_right
+
+BULK_LIMIT = 10_000  # lines; above this the view switches to windowed rendering
+
+# ----- lazy line sequences (len + integer indexing) -----
+class Lines:
+    # fmt(item) for every item of a sequence
+    def __init__(self, items, fmt=str):
+        self.items = items
+        self.fmt = fmt
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, i):
+        return self.fmt(self.items[i])
+
+class Grouped:
+    # `per_line` items per display line, for long comma-separated lists
+    def __init__(self, items, per_line=10, sep=", ", fmt=str):
+        self.items = items
+        self.per_line = per_line
+        self.sep = sep
+        self.fmt = fmt
+
+    def __len__(self):
+        return -(-len(self.items) // self.per_line)
+
+    def __getitem__(self, i):
+        start = i * self.per_line
+        line = self.sep.join(map(self.fmt, self.items[start:start + self.per_line]))
+        return line + self.sep.rstrip() if start + self.per_line < len(self.items) else line
+
+class Concat:
+    def __init__(self, *parts):
+        self.parts = parts
+        self.starts = []
+        n = 0
+        for part in parts:
+            self.starts.append(n)
+            n += len(part)
+        self.n = n
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        k = bisect_right(self.starts, i) - 1
+        return self.parts[k][i - self.starts[k]]
+
+# ----- widget -----
+class ResultView(ttk.Frame):
+    def __init__(self, parent, bulk_limit=BULK_LIMIT, **text_opts):
+        super().__init__(parent)
+        self.bulk_limit = bulk_limit
+        self._wrap = text_opts.pop("wrap", tk.WORD)
+        self.text = tk.Text(self, wrap=self._wrap, **text_opts)
+        self.vsb = ttk.Scrollbar(self, orient="vertical")
+        self.hsb = ttk.Scrollbar(self, orient="horizontal", command=self.text.xview)
+        self.text.configure(xscrollcommand=self.hsb.set)
+        self.text.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self._lines = None  # source of the windowed mode
+        self._top = 0
+        self._linespace = None
+        self._set_bulk_mode()
+
+        self.text.bind("<Configure>", lambda e: self._render())
+        self.text.bind("<MouseWheel>", self._on_wheel)
+        self.text.bind("<Button-4>", lambda e: self._scroll_event(-3))
+        self.text.bind("<Button-5>", lambda e: self._scroll_event(3))
+        self.text.bind("<Prior>", lambda e: self._scroll_event(-1, "pages"))
+        self.text.bind("<Next>", lambda e: self._scroll_event(1, "pages"))
+        self.text.bind("<Control-Home>", lambda e: self._scroll_event(-len(self._lines or ())))
+        self.text.bind("<Control-End>", lambda e: self._scroll_event(len(self._lines or ())))
+
+    @property
+    def windowed(self):
+        return self._lines is not None
+
+    def clear(self):
+        self._set_bulk_mode()
+        self.text.delete("1.0", tk.END)
+
+    def show(self, lines, bulk=None):
+        # lines: sequence of display lines; bulk: optional callable returning
+        # the exact text to insert when the output is small
+        self.clear()
+        if len(lines) <= self.bulk_limit:
+            text = bulk() if bulk is not None else "\n".join(lines[i] for i in range(len(lines)))
+            self.text.insert(tk.END, text)
+            return
+        self._lines = lines
+        self._top = 0
+        self.text.configure(wrap="none", yscrollcommand="", state="disabled")
+        self.vsb.configure(command=self._yview)
+        self.hsb.grid(row=1, column=0, sticky="ew")
+        self._render()
+
+    def _set_bulk_mode(self):
+        self._lines = None
+        self.text.configure(wrap=self._wrap, yscrollcommand=self.vsb.set, state="normal")
+        self.vsb.configure(command=self.text.yview)
+        self.hsb.grid_remove()
+
+    def _visible_rows(self):
+        if self._linespace is None:
+            self._linespace = tkfont.Font(font=self.text.cget("font")).metrics("linespace") or 16
+        pad = 2 * int(self.text.cget("pady") or 0)
+        return max(1, (self.text.winfo_height() - pad) // self._linespace)
+
+    def _render(self):
+        if self._lines is None:
+            return
+        n = len(self._lines)
+        rows = self._visible_rows()
+        self._top = max(0, min(self._top, n - rows))
+        end = min(n, self._top + rows)
+        chunk = "\n".join(self._lines[i] for i in range(self._top, end))
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", chunk)
+        self.text.configure(state="disabled")
+        self.vsb.set(self._top / n, end / n)
+
+    def _yview(self, *args):
+        if self._lines is None:
+            return
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * len(self._lines))
+        elif args[0] == "scroll":
+            step = self._visible_rows() if args[2] == "pages" else 1
+            self._top += int(args[1]) * step
+        self._render()
+
+    def _scroll_event(self, amount, what="units"):
+        if self._lines is None:
+            return None
+        self._yview("scroll", amount, what)
+        return "break"
+
+    def _on_wheel(self, event):
+        if self._lines is None:
+            return None
+        return self._scroll_event(-3 if event.delta > 0 else 3)
@@ -0,0 +1,121 @@
+# ---------------- SEARCH INDEX ----------------
+# Index behind the preview filter, over a dataset.CategoricalTable. Matching
+# is done on each column's distinct values and mapped back to rows through
+# the code arrays, so no per-row text is ever stored.
+# Queries are clauses separated by commas, all of which must match:
+#   Color=White      exact value of one column (case-insensitive)
+#   whi              substring anywhere in the row text "index value value ..."
+# A substring without spaces lies inside one cell, so it is matched against
+# the distinct values alone; one with spaces is narrowed that way and then
+# checked against the joined text of the remaining rows.
+# Substring results are cached, so a needle typed one character further is
+# only checked against the rows that matched its prefix.
+import math
+from collections import OrderedDict
+
+TEXT_CACHE_SIZE = 32
+
+class SearchIndex:
+    def __init__(self, table):
+        self.table = table
+        self._col_pos = {c.lower(): j for j, c in enumerate(table.cols)}
+        self._columns = None  # code arrays, fetched once
+        self._text_cache = OrderedDict()
+
+    def __len__(self):
+        return len(self.table)
+
+    def columns(self):
+        if self._columns is None:
+            self._columns = [self.table.column(j) for j in range(len(self.table.cols))]
+        return self._columns
+
+    def query(self, q):
+        # sorted row ids (numpy array) matching every clause of q
+        import numpy as np
+        result = None
+        for clause in (c.strip() for c in q.lower().split(",")):
+            if not clause:
+                continue
+            ids = self._clause(clause)
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+            if not len(result):
+                break
+        return np.arange(len(self)) if result is None else result
+
+    def _clause(self, clause):
+        import numpy as np
+        col, sep, value = clause.partition("=")
+        j = self._col_pos.get(col.strip()) if sep else None
+        if j is None:
+            return self._text_matches(clause)
+        value = value.strip()
+        hit = np.fromiter((v.lower() == value for v in self.table.categories[j]), dtype=bool,
+                          count=len(self.table.categories[j]))
+        return np.flatnonzero(hit[self.columns()[j]])
+
+    def _text_matches(self, needle):
+        ids = self._text_cache.get(needle)
+        if ids is not None:
+            self._text_cache.move_to_end(needle)
+            return ids
+        # rows matching any cached needle contained in this one are a superset
+        for prev, prev_ids in self._text_cache.items():
+            if prev in needle and (ids is None or len(prev_ids) < len(ids)):
+                ids = prev_ids
+        for piece in needle.split():
+            ids = self._piece_matches(piece, ids)
+            if not len(ids):
+                break
+        if " " in needle and len(ids):
+            ids = self._joined_matches(needle, ids)
+        self._text_cache[needle] = ids
+        if len(self._text_cache) > TEXT_CACHE_SIZE:
+            self._text_cache.popitem(last=False)
+        return ids
+
+    def _piece_matches(self, piece, ids=None):
+        # rows (of ids, or all) with a cell containing `piece`
+        import numpy as np
+        rows = np.arange(len(self)) if ids is None else ids
+        mask = np.zeros(len(rows), dtype=bool)
+        for cats, col in zip(self.table.categories, self.columns()):
+            hit = np.fromiter((piece in v.lower() for v in cats), dtype=bool, count=len(cats))
+            if hit.any():
+                mask |= hit[col if ids is None else col[ids]]
+        if piece.isdigit():  # the index column
+            mask |= np.fromiter((piece in str(i) for i in rows.tolist()), dtype=bool, count=len(rows))
+        return rows[mask]
+
+    def _joined_matches(self, needle, ids):
+        # Check each distinct combination of cell values once. Only a needle
+        # starting with digits can reach into the index, and only those rows
+        # are checked one by one.
+        import numpy as np
+        cats = [[v.lower() for v in c] for c in self.table.categories]
+        sizes = [max(len(c), 1) for c in cats]
+        if math.prod(sizes) < 2 ** 62:
+            # one mixed-radix int per row, so np.unique sorts plain ints
+            key = np.zeros(len(ids), dtype=np.int64)
+            for col, size in zip(self.columns(), sizes):
+                key = key * size + col[ids]
+            combos, inverse = np.unique(key, return_inverse=True)
+            rows = []
+            for k in combos.tolist():
+                combo = []
+                for size in reversed(sizes):
+                    k, c = divmod(k, size)
+                    combo.append(c)
+                rows.append(combo[::-1])
+        else:
+            combos, inverse = np.unique(np.stack([col[ids] for col in self.columns()], axis=1),
+                                        axis=0, return_inverse=True)
+            rows = combos.tolist()
+        inverse = inverse.ravel()
+        texts = [" ".join(cats[j][c] for j, c in enumerate(combo)) for combo in rows]
+        hit = np.fromiter((needle in t for t in texts), dtype=bool, count=len(texts))
+        mask = hit[inverse]
+        if needle.split()[0].isdigit():
+            for k in np.flatnonzero(~mask).tolist():
+                mask[k] = needle in f"{int(ids[k])} {texts[inverse[k]]}"
+        return ids[mask]
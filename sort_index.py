@@ -0,0 +1,70 @@
+# ---------------- SORT INDEX ----------------
+# Sorting for the preview table, done on a dataset.CategoricalTable. Each
+# column's distinct values are sorted once (numeric columns compare as
+# numbers) and its codes mapped to ranks, so any sort is a np.lexsort over
+# small ints. Multi-column sorts are stable and fall back to row order;
+# permutations are cached per sort spec.
+from collections import OrderedDict
+
+ROW_ID = -1  # sort key for the row number itself
+PERM_CACHE_SIZE = 8
+
+def typed_key(values):
+    # numbers compare as numbers when every non-blank value parses as one;
+    # blanks sort first
+    try:
+        for v in values:
+            if v != "":
+                float(v)
+    except (TypeError, ValueError):
+        return str
+    return lambda v: float(v) if v != "" else float("-inf")
+
+class SortIndex:
+    def __init__(self, table):
+        self.table = table
+        self.n = len(table)
+        self._ranks = {}
+        self._perms = OrderedDict()
+
+    def ranks(self, j):
+        import numpy as np
+        if j == ROW_ID:
+            return np.arange(self.n)
+        r = self._ranks.get(j)
+        if r is None:
+            cats = self.table.categories[j]
+            key = typed_key(cats)
+            rank_of_code = np.empty(len(cats), dtype=np.int64)
+            rank_of_code[sorted(range(len(cats)), key=lambda c: key(cats[c]))] = np.arange(len(cats))
+            r = self._ranks[j] = rank_of_code[self.table.column(j)]
+        return r
+
+    def permutation(self, spec):
+        # spec: ((column, reverse), ...), most significant first
+        import numpy as np
+        spec = tuple(spec)
+        perm = self._perms.get(spec)
+        if perm is not None:
+            self._perms.move_to_end(spec)
+            return perm
+        keys = [np.arange(self.n)]  # lexsort: the last key is the primary one
+        for j, reverse in reversed(spec):
+            r = self.ranks(j)
+            keys.append(-r if reverse else r)
+        perm = self._perms[spec] = np.lexsort(keys)
+        if len(self._perms) > PERM_CACHE_SIZE:
+            self._perms.popitem(last=False)
+        return perm
+
+    def order(self, spec, ids=None):
+        # display order: the rows in ids (all rows when None), sorted by spec
+        import numpy as np
+        if not spec:
+            return range(self.n) if ids is None else ids
+        perm = self.permutation(spec)
+        if ids is None:
+            return perm
+        keep = np.zeros(self.n, dtype=bool)
+        keep[np.asarray(ids, dtype=np.int64)] = True
+        return perm[keep[perm]]
@@ -0,0 +1,90 @@
+# ---------------- TABLE VIEW ----------------
+# Windowed Treeview for large tables. Rows stay in the caller's backing store
+# and are reached through get_row(row_id); the Treeview only holds one item per
+# visible line, whose values are rewritten as the view scrolls. Filtering and
+# sorting hand the view a new display order (a sequence of row ids).
+from tkinter import ttk
+
+class TableView(ttk.Frame):
+    def __init__(self, parent, height=9, **tree_opts):
+        super().__init__(parent)
+        self.tree = ttk.Treeview(self, show="headings", height=height, **tree_opts)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._yview)
+        self.hsb = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.hsb.set)
+        self.vsb.pack(side="right", fill="y")
+        self.hsb.pack(side="bottom", fill="x")
+
+        self._get_row = None
+        self._order = ()
+        self._top = 0
+        self._items = []  # pooled Treeview items, one per visible line
+
+        self.tree.bind("<Configure>", lambda e: self._render())
+        self.tree.bind("<MouseWheel>", lambda e: self._scroll_event(-3 if e.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda e: self._scroll_event(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_event(3))
+        self.tree.bind("<Up>", lambda e: self._scroll_event(-1))
+        self.tree.bind("<Down>", lambda e: self._scroll_event(1))
+        self.tree.bind("<Prior>", lambda e: self._scroll_event(-1, "pages"))
+        self.tree.bind("<Next>", lambda e: self._scroll_event(1, "pages"))
+        self.tree.bind("<Home>", lambda e: self._scroll_event(-len(self._order)))
+        self.tree.bind("<End>", lambda e: self._scroll_event(len(self._order)))
+
+    def __len__(self):
+        return len(self._order)
+
+    @property
+    def order(self):
+        return self._order
+
+    def show(self, columns, get_row, order):
+        self.tree.configure(columns=columns, displaycolumns=columns)
+        self._get_row = get_row
+        self.set_order(order)
+
+    def set_order(self, order):
+        self._order = order
+        self._top = 0
+        self._render()
+
+    def _visible_rows(self):
+        rows = int(self.tree.cget("height"))
+        if self._items:
+            box = self.tree.bbox(self._items[0])
+            if box:
+                rows = max(1, (self.tree.winfo_height() - box[1]) // box[3])
+        return rows
+
+    def _render(self):
+        if self._get_row is None:
+            return
+        n = len(self._order)
+        rows = self._visible_rows()
+        self._top = max(0, min(self._top, n - rows))
+        end = min(n, self._top + rows)
+        while len(self._items) < end - self._top:
+            self._items.append(self.tree.insert("", "end"))
+        while len(self._items) > end - self._top:
+            self.tree.delete(self._items.pop())
+        for pos, item in enumerate(self._items, self._top):
+            self.tree.item(item, values=self._get_row(self._order[pos]),
+                           tags=("even" if pos % 2 == 0 else "odd",))
+        self.tree.yview_moveto(0)
+        if n:
+            self.vsb.set(self._top / n, end / n)
+        else:
+            self.vsb.set(0, 1)
+
+    def _yview(self, *args):
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * len(self._order))
+        elif args[0] == "scroll":
+            step = self._visible_rows() if args[2] == "pages" else 1
+            self._top += int(args[1]) * step
+        self._render()
+
+    def _scroll_event(self, amount, what="units"):
+        self._yview("scroll", amount, what)
+        return "break"
@@ -0,0 +1,90 @@
+# SearchIndex and SortIndex against the naive row-by-row filter and sort
+# they replace.
+import random
+import unittest
+
+from dataset import CategoricalTable
+from search_index import SearchIndex
+from sort_index import ROW_ID, SortIndex, typed_key
+
+COLS = ["Animal", "Size", "Weight", "Target"]
+
+def make_table(n, seed=0):
+    rng = random.Random(seed)
+    rows = [[rng.choice(["Dog", "Cat", "Hot dog", "Cow", ""]),
+             rng.choice(["Small", "Big", "big small"]),
+             rng.choice(["1", "2.5", "10", "", "-3"]),
+             rng.choice(["Yes", "No"])] for _ in range(n)]
+    return CategoricalTable(COLS, rows), rows
+
+def naive_query(rows, q):
+    # the old filter: every clause matches the row text "index value value ..."
+    # or, for col=value, that column exactly (case-insensitive)
+    cols = [c.lower() for c in COLS]
+    out = []
+    for i, row in enumerate(rows):
+        text = f"{i} " + " ".join(v.lower() for v in row)
+        ok = True
+        for clause in (c.strip() for c in q.lower().split(",")):
+            if not clause:
+                continue
+            col, sep, value = clause.partition("=")
+            if sep and col.strip() in cols:
+                ok = row[cols.index(col.strip())].lower() == value.strip()
+            else:
+                ok = clause in text
+            if not ok:
+                break
+        if ok:
+            out.append(i)
+    return out
+
+class SearchIndexTest(unittest.TestCase):
+    QUERIES = ["", "dog", "DOG", "hot d", "g sm", "g big", "animal=dog", "animal=", "size=big small",
+               "weight=2.5, target=yes", "1", "12 ", "7 cat", "cow, no", "nothing", "target=maybe",
+               "unknown=1", "2.5 ", "sm", "small, sm, s"]
+
+    def test_matches_naive_filter(self):
+        table, rows = make_table(400)
+        index = SearchIndex(table)
+        for q in self.QUERIES:
+            self.assertEqual(index.query(q).tolist(), naive_query(rows, q), q)
+
+    def test_typing_a_needle_one_character_at_a_time(self):
+        # the prefix cache must not change results
+        table, rows = make_table(300, seed=1)
+        index = SearchIndex(table)
+        for needle in ("hot dog big", "12 dog"):
+            for k in range(1, len(needle) + 1):
+                self.assertEqual(index.query(needle[:k]).tolist(), naive_query(rows, needle[:k]),
+                                 needle[:k])
+
+class SortIndexTest(unittest.TestCase):
+    SPECS = [((0, False),), ((2, False),), ((2, True),), ((1, True), (0, False)),
+             ((3, False), (2, True), (0, False)), ((ROW_ID, True),), ()]
+
+    def naive_order(self, rows, spec):
+        order = list(range(len(rows)))
+        for j, reverse in reversed(spec):  # stable sorts, least significant first
+            if j == ROW_ID:
+                order.sort(key=lambda i: i, reverse=reverse)
+                continue
+            key = typed_key([r[j] for r in rows])
+            order.sort(key=lambda i: key(rows[i][j]), reverse=reverse)
+        return order
+
+    def test_matches_naive_sort(self):
+        table, rows = make_table(300, seed=2)
+        index = SortIndex(table)
+        for spec in self.SPECS:
+            self.assertEqual(list(index.order(spec)), self.naive_order(rows, spec), spec)
+
+    def test_order_of_filtered_rows(self):
+        table, rows = make_table(300, seed=3)
+        ids = SearchIndex(table).query("dog")
+        spec = ((2, True), (1, False))
+        expected = [i for i in self.naive_order(rows, spec) if i in set(ids.tolist())]
+        self.assertEqual(list(SortIndex(table).order(spec, ids)), expected)
+
+if __name__ == "__main__":
+    unittest.main()
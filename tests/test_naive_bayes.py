@@ -0,0 +1,98 @@
+# Equivalence checks for naive_bayes: the vectorised and incremental paths
+# against the plain per-row model and against refits.
+import random
+import unittest
+
+from dataset import CategoricalTable
+from naive_bayes import LEAVE_ONE_OUT, NaiveBayesModel, cross_validate
+
+COLS = ["size", "color", "shape", "label"]
+
+def make_rows(n, seed=0, blanks=True):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        label = rng.choice("ABC")
+        # features loosely depend on the label so the model has something to learn
+        size = rng.choice(["s", "m", "l"] if label != "C" else ["l", "xl"])
+        color = rng.choice(["red", "green", "blue", ""] if blanks else ["red", "green", "blue"])
+        shape = rng.choice(["round", "square"]) + ("" if label == "A" else rng.choice(["", "ish"]))
+        rows.append([size, color, shape, label])
+    return rows
+
+def counts(model):
+    return model.class_counts, model.value_counts, model.total
+
+class BatchScoringTest(unittest.TestCase):
+    def test_batch_matches_per_row(self):
+        model = NaiveBayesModel().fit(make_rows(300), COLS)
+        queries = [r[:-1] for r in make_rows(200, seed=1)] + [["s", "", "never seen"], ["", "", ""]]
+        probs = model.predict_proba_batch(queries)
+        labels, _ = model.predict_batch(queries)
+        for q, row, label in zip(queries, probs, labels):
+            expected = model.predict_proba(q)
+            for j, c in enumerate(model.classes):
+                self.assertAlmostEqual(row[j], expected[c], places=12)
+            self.assertEqual(label, model.predict(q)[0])
+
+    def test_columnar_fit_matches_row_fit(self):
+        rows = make_rows(500)
+        self.assertEqual(counts(NaiveBayesModel().fit(CategoricalTable(COLS, rows), COLS)),
+                         counts(NaiveBayesModel().fit(rows, COLS)))
+
+class IncrementalTest(unittest.TestCase):
+    def test_partial_fit_matches_refit(self):
+        rows = make_rows(400)
+        model = NaiveBayesModel().fit(rows[:100], COLS)
+        model.partial_fit(rows[100:250]).partial_fit(rows[250:])
+        self.assertEqual(counts(model), counts(NaiveBayesModel().fit(rows, COLS)))
+
+    def test_merge_matches_partial_fit(self):
+        rows = make_rows(400)
+        model = NaiveBayesModel().fit(rows[:150], COLS)
+        model.merge(NaiveBayesModel().fit(CategoricalTable(COLS, rows[150:]), COLS))
+        self.assertEqual(counts(model), counts(NaiveBayesModel().fit(rows, COLS)))
+
+    def test_forget_matches_refit(self):
+        rows = make_rows(400)
+        model = NaiveBayesModel().fit(rows, COLS).forget(rows[:120])
+        refit = NaiveBayesModel().fit(rows[120:], COLS)
+        self.assertEqual(counts(model), counts(refit))
+        self.assertEqual(model.classes, refit.classes)
+
+    def test_forget_unknown_row_changes_nothing(self):
+        rows = make_rows(100)
+        model = NaiveBayesModel().fit(rows, COLS)
+        before = repr(counts(model))
+        with self.assertRaises(ValueError):
+            model.forget(rows[:10] + [["s", "red", "round", "never learned"]])
+        with self.assertRaises(ValueError):
+            model.forget([rows[0]] * 101)  # more copies than were learned
+        self.assertEqual(repr(counts(model)), before)
+
+class CrossValidationTest(unittest.TestCase):
+    def test_leave_one_out_matches_refits(self):
+        rows = make_rows(120, seed=3)
+        res = cross_validate(CategoricalTable(COLS, rows), LEAVE_ONE_OUT)
+        labels = res["labels"]
+        confusion = [[0] * len(labels) for _ in labels]
+        for i, row in enumerate(rows):
+            model = NaiveBayesModel().fit(rows[:i] + rows[i + 1:], COLS)
+            pred, _ = model.predict(row[:-1])
+            confusion[labels.index(row[-1])][labels.index(pred)] += 1
+        self.assertEqual(res["confusion"], confusion)
+        self.assertEqual(res["n"], len(rows))
+
+    def test_k_fold_covers_every_row_once(self):
+        rows = make_rows(200, seed=4)
+        res = cross_validate(CategoricalTable(COLS, rows), 5)
+        self.assertEqual(sum(map(sum, res["confusion"])), len(rows))
+        self.assertEqual(res["support"], {c: sum(r[-1] == c for r in rows) for c in res["labels"]})
+
+    def test_folds_beyond_rows_is_leave_one_out(self):
+        table = CategoricalTable(COLS, make_rows(30, seed=5))
+        self.assertEqual(cross_validate(table, 30)["confusion"],
+                         cross_validate(table, LEAVE_ONE_OUT)["confusion"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+# Hashed TF-IDF and the text classifier against scikit-learn. Tokenising is
+# nlp_engine's job (and needs NLTK data); here documents are split on
+# whitespace by patching nlp_engine.doc_counts, so only the arithmetic is
+# under test.
+import random
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from unittest import mock
+
+import nlp_engine
+import text_classifier
+
+try:
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+except ImportError:
+    np = None
+
+def split_counts(doc):
+    return Counter(doc.split())
+
+def make_docs(n, seed=0):
+    rng = random.Random(seed)
+    vocab = {c: [f"{c}{i}" for i in range(30)] for c in ("sport", "tech", "food")}
+    shared = [f"w{i}" for i in range(50)]
+    docs = []
+    for _ in range(n):
+        label = rng.choice(sorted(vocab))
+        words = [rng.choice(vocab[label] if rng.random() < 0.4 else shared)
+                 for _ in range(rng.randint(1, 25))]
+        docs.append((label, " ".join(words)))
+    return docs
+
+@unittest.skipIf(np is None, "needs numpy and scikit-learn")
+@mock.patch.object(nlp_engine, "doc_counts", split_counts)
+class CorpusTfIdfTest(unittest.TestCase):
+    def test_matches_tfidf_vectorizer(self):
+        docs = [text for _, text in make_docs(200)]
+        vec = TfidfVectorizer(analyzer=str.split)
+        X = vec.fit_transform(docs).toarray()
+        vocab = vec.get_feature_names_out()
+        for i, top in nlp_engine.corpus_tf_idf(docs, top=5):
+            row = X[i - 1]
+            expected = sorted(((vocab[j], row[j]) for j in np.flatnonzero(row)), key=lambda t: -t[1])
+            # compare scores only: equal scores may come in any order
+            self.assertEqual(len(top), min(5, len(expected)))
+            for (_, got), (_, want) in zip(top, expected):
+                self.assertAlmostEqual(got, want, places=9)
+            for term, score in top:
+                self.assertAlmostEqual(score, row[vec.vocabulary_[term]], places=9)
+
+    def test_callable_source_matches_list(self):
+        docs = [text for _, text in make_docs(50, seed=1)]
+        self.assertEqual(list(nlp_engine.corpus_tf_idf(lambda: iter(docs))),
+                         list(nlp_engine.corpus_tf_idf(docs)))
+
+@unittest.skipIf(np is None, "needs numpy and scikit-learn")
+@mock.patch.object(nlp_engine, "doc_counts", split_counts)
+class TextClassifierTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_matches_multinomial_nb(self):
+        train = make_docs(2000)
+        text_classifier.fit(train, self.dir)
+        model = text_classifier.TextClassifier.load(self.dir)
+
+        vec = TfidfVectorizer(analyzer=str.split, use_idf=False, norm=None)
+        Xs = vec.fit_transform([t for _, t in train])
+        ref = MultinomialNB(alpha=1.0).fit(Xs, [c for c, _ in train])
+        self.assertEqual(model.classes, list(ref.classes_))
+
+        test = [t for _, t in make_docs(300, seed=1)] + ["unseen words only", ""]
+        got = np.exp(model.predict_log_proba(model.transform([split_counts(t) for t in test])))
+        want = ref.predict_proba(vec.transform(test))
+        np.testing.assert_allclose(got, want, rtol=0, atol=1e-12)
+
+    def test_chunked_training_matches_one_block(self):
+        train = make_docs(1000, seed=2)
+        with mock.patch.object(text_classifier, "DOC_CHUNK", 64):
+            text_classifier.fit(lambda: iter(train), self.dir)
+        chunked = text_classifier.TextClassifier.load(self.dir)
+        other = tempfile.mkdtemp()
+        try:
+            text_classifier.fit(train, other)
+            whole = text_classifier.TextClassifier.load(other)
+            np.testing.assert_allclose(chunked.log_prob, whole.log_prob, rtol=0, atol=1e-12)
+            np.testing.assert_allclose(chunked.log_prior, whole.log_prior, rtol=0, atol=1e-12)
+        finally:
+            shutil.rmtree(other)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,315 @@
+# ---------------- TEXT CLASSIFIER ----------------
+# Multinomial Naive Bayes over the same term counts as Bag of Words. Training
+# is one pass over labelled documents: each chunk becomes a sparse
+# document-term matrix X and a one-hot label matrix Y, and the per-class term
+# counts are accumulated as Y^T X, so only the vocabulary and the
+# (terms x classes) table are held in memory. Stored like corpus_model:
+#   meta.json                       classes, counts and format version, written last
+#   terms.bin + term_offsets.npy    sorted vocabulary
+#   feature_log_prob.npy            (terms, classes) float64, Laplace-smoothed
+#   class_log_prior.npy             (classes,) float64
+# Rows are terms, so scoring a document reads only the rows of its own terms
+# from the memory-mapped table; a batch of documents is one sparse product.
+# Labelled data is either a folder with one subfolder of text files per
+# class, or a CSV/TSV file with a text column and a label column.
+import argparse
+import csv
+import json
+import os
+import sys
+from array import array
+from collections import deque
+from contextlib import nullcontext
+
+import nlp_engine
+from corpus_model import load_terms, write_terms
+from dataset import infer_target
+
+FORMAT_VERSION = 1
+ALPHA = 1.0  # Laplace smoothing
+DOC_CHUNK = 8192  # documents per sparse block
+CLASSIFY_OP = "Text Classification (NB)"  # the GUI's name for classify()
+
+def _field_limit():
+    # documents can be longer than csv's default 128 KiB field limit
+    limit = sys.maxsize
+    while True:
+        try:
+            csv.field_size_limit(limit)
+            return
+        except OverflowError:
+            limit //= 2
+
+def read_labelled(paths):
+    # yields (label, text) from class folders and CSV/TSV files
+    for path in paths:
+        if os.path.isdir(path):
+            for label in sorted(os.listdir(path)):
+                folder = os.path.join(path, label)
+                if not os.path.isdir(folder):
+                    continue
+                for name in sorted(os.listdir(folder)):
+                    with open(os.path.join(folder, name), encoding="utf-8", errors="replace") as f:
+                        yield label, f.read()
+            continue
+        _field_limit()
+        delimiter = "\t" if path.lower().endswith((".tsv", ".tab")) else ","
+        with open(path, newline="", encoding="utf-8", errors="replace") as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            header = [h.strip() for h in next(reader, [])]
+            if len(header) < 2:
+                raise ValueError(f"{path}: needs a header with a text column and a label column")
+            t = infer_target(header)
+            lowered = [h.lower() for h in header]
+            x = lowered.index("text") if "text" in lowered else next(j for j in range(len(header)) if j != t)
+            for row in reader:
+                if len(row) > max(t, x) and row[t].strip():
+                    yield row[t].strip(), row[x]
+
+def _doc_terms(counts, ids):
+    # term ids and counts of one document, adding unseen terms to ids
+    cols, vals = [], []
+    for w, c in counts.items():
+        j = ids.get(w)
+        if j is None:
+            j = ids[w] = len(ids)
+        cols.append(j)
+        vals.append(c)
+    return cols, vals
+
+def fit(labelled, path, workers=1, progress=None, cancel=None):
+    # labelled: a list of (label, text), or a zero-arg callable returning an
+    # iterable of them (e.g. lambda: read_labelled(paths)). Writes the model
+    # to `path` and returns its meta dict. progress(done, total) is called
+    # per DOC_CHUNK documents; total is None when labelled is a callable.
+    import numpy as np
+    from numpy.lib.format import open_memmap
+    from scipy import sparse
+    total = len(labelled) if isinstance(labelled, list) else None
+    pairs = iter(labelled if total is not None else labelled())
+    labels = deque()  # labels of documents handed out, not yet counted
+
+    def texts():
+        for label, text in pairs:
+            labels.append(label)
+            yield text
+
+    ids, class_ids = {}, {}
+    table = np.zeros((1024, 4))  # (terms, classes) counts, grown by doubling
+    class_count = []
+    n_docs = 0
+    indptr, indices, data, y = [0], array("q"), array("d"), []
+
+    def flush():
+        nonlocal table
+        if not y:
+            return
+        k, n_terms = len(class_ids), len(ids)
+        X = sparse.csr_matrix((np.frombuffer(data, dtype=np.float64), np.frombuffer(indices, dtype=np.int64),
+                               np.asarray(indptr, dtype=np.int64)), shape=(len(y), n_terms))
+        Y = sparse.csr_matrix((np.ones(len(y)), (np.arange(len(y)), y)), shape=(len(y), k))
+        block = (Y.T @ X).tocoo()  # (classes, terms)
+        if n_terms > table.shape[0] or k > table.shape[1]:
+            grown = np.zeros((max(n_terms, 2 * table.shape[0]), max(k, 2 * table.shape[1])))
+            grown[:table.shape[0], :table.shape[1]] = table
+            table = grown
+        table[block.col, block.row] += block.data
+        del X, Y, block  # release the views of the arrays before they are cleared
+        del indptr[1:], indices[:], data[:], y[:]
+
+    for counts in nlp_engine._iter_doc_counts(texts(), workers, cancel):
+        label = labels.popleft()
+        c = class_ids.get(label)
+        if c is None:
+            c = class_ids[label] = len(class_ids)
+            class_count.append(0)
+        class_count[c] += 1
+        cols, vals = _doc_terms(counts, ids)
+        indices.extend(cols)
+        data.extend(vals)
+        indptr.append(len(indices))
+        y.append(c)
+        n_docs += 1
+        if len(y) >= DOC_CHUNK:
+            flush()
+            nlp_engine._check(cancel)
+            if progress is not None:
+                progress(n_docs, total)
+    flush()
+    if progress is not None:
+        progress(n_docs, total)
+    if len(class_ids) < 2:
+        raise ValueError("training data needs at least two classes")
+
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, "meta.json")
+    if os.path.exists(meta_path):
+        os.remove(meta_path)  # the model is incomplete until meta.json is back
+    vocab = sorted(ids)
+    classes = sorted(class_ids)
+    rows = np.fromiter((ids[w] for w in vocab), dtype=np.int64, count=len(vocab))
+    cols = [class_ids[c] for c in classes]
+    del ids
+    write_terms(path, vocab)
+    counts = table[rows][:, cols]
+    del table, rows
+    log_prob = open_memmap(os.path.join(path, "feature_log_prob.npy"), mode="w+",
+                           dtype=np.float64, shape=counts.shape)
+    log_prob[:] = np.log(counts + ALPHA) - np.log(counts.sum(axis=0) + ALPHA * len(vocab))
+    log_prob.flush()
+    del log_prob
+    n_c = np.array([class_count[class_ids[c]] for c in classes], dtype=np.float64)
+    np.save(os.path.join(path, "class_log_prior.npy"), np.log(n_c / n_docs))
+
+    meta = {"format": FORMAT_VERSION, "n_docs": n_docs, "n_terms": len(vocab), "classes": classes,
+            "class_count": n_c.astype(int).tolist(), "alpha": ALPHA}
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+class TextClassifier:
+    def __init__(self, terms, log_prob, log_prior, meta):
+        self.terms = terms
+        self.log_prob = log_prob
+        self.log_prior = log_prior
+        self.meta = meta
+
+    @property
+    def classes(self):
+        return self.meta["classes"]
+
+    @classmethod
+    def load(cls, path):
+        import numpy as np
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION or "classes" not in meta:
+            raise ValueError(f"{path}: not a text classifier (format {meta.get('format')!r})")
+        arr = lambda name: np.load(os.path.join(path, name), mmap_mode="r")
+        return cls(load_terms(path), arr("feature_log_prob.npy"), arr("class_log_prior.npy"), meta)
+
+    def transform(self, counts_list):
+        # (documents, terms) CSR of term counts; unseen terms are dropped
+        import numpy as np
+        from scipy import sparse
+        indptr, indices, data = [0], array("q"), array("d")
+        for counts in counts_list:
+            hits = sorted((j, c) for j, c in ((self.terms.get(w), c) for w, c in counts.items()) if j >= 0)
+            indices.extend(j for j, _ in hits)
+            data.extend(c for _, c in hits)
+            indptr.append(len(indices))
+        return sparse.csr_matrix((np.frombuffer(data, dtype=np.float64), np.frombuffer(indices, dtype=np.int64),
+                                  np.asarray(indptr, dtype=np.int64)),
+                                 shape=(len(indptr) - 1, len(self.terms)))
+
+    def predict_log_proba(self, X):
+        # X: CSR from transform() -> (documents, classes), normalised
+        import numpy as np
+        jll = X @ self.log_prob + self.log_prior
+        top = jll.max(axis=1, keepdims=True)
+        return jll - (top + np.log(np.exp(jll - top).sum(axis=1, keepdims=True)))
+
+    def evidence(self, counts, c, k=10):
+        # terms of one document that most favour class c over the runner-up
+        import numpy as np
+        X = self.transform([counts])
+        if X.nnz == 0 or len(self.classes) < 2:
+            return []
+        rows = np.asarray(self.log_prob[X.indices])
+        others = np.delete(rows, c, axis=1).max(axis=1)
+        weight = X.data * (rows[:, c] - others)
+        order = np.argsort(-weight, kind="stable")[:k]
+        return [(self.terms[int(X.indices[i])], float(weight[i])) for i in order if weight[i] > 0]
+
+    def classify(self, text, unit="Whole text", progress=None, cancel=None, workers=1, stage=None):
+        # result dict for the GUIs. One document: its class probabilities and
+        # strongest terms; several (unit Paragraphs / Lines): a label per document
+        import numpy as np
+        nlp_engine.require("Bag of Words (BoW)")
+        stage = stage or (lambda name: nullcontext())
+        docs = nlp_engine.split_documents(text, unit)
+        with stage("tokenize"):
+            if len(docs) == 1:
+                an = nlp_engine.analysis(docs[0]).build(progress=progress, cancel=cancel, workers=workers)
+                counts = [an.counts]
+            else:
+                counts = []
+                for c in nlp_engine._iter_doc_counts(docs, workers, cancel):
+                    counts.append(c)
+                    if progress is not None:
+                        progress(len(counts), len(docs))
+        with stage("vectorize"):
+            X = self.transform(counts)
+        with stage("score"):
+            probs = np.exp(self.predict_log_proba(X))
+            best = probs.argmax(axis=1)
+            if len(docs) != 1:
+                labels = [self.classes[c] for c in best.tolist()]
+                return {"classes": self.classes,
+                        "labels": list(zip(range(1, len(docs) + 1), labels, probs[np.arange(len(docs)), best].tolist()))}
+            order = np.argsort(-probs[0], kind="stable")
+            return {"classes": self.classes, "label": self.classes[int(best[0])],
+                    "probs": [(self.classes[int(c)], float(probs[0, c])) for c in order],
+                    "evidence": self.evidence(counts[0], int(best[0]))}
+
+# ---------------- CLI ----------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Train and apply a multinomial Naive Bayes text classifier.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    fp = sub.add_parser("fit", help="train on labelled data and save the model to MODEL_DIR")
+    fp.add_argument("model_dir")
+    fp.add_argument("inputs", nargs="+", metavar="data",
+                    help="folder with one subfolder of text files per class, or CSV/TSV "
+                         "with a text column and a label column")
+    fp.add_argument("-j", "--workers", type=int, default=1,
+                    help="worker processes (0 = one per CPU core)")
+    pp = sub.add_parser("predict", help="label documents with a saved model")
+    pp.add_argument("model_dir")
+    pp.add_argument("inputs", nargs="*", metavar="input", help="text file(s) (default: stdin)")
+    pp.add_argument("--docs", choices=["lines", "paragraphs", "files"], default="lines",
+                    help="what counts as one document (default: lines)")
+    pp.add_argument("-j", "--workers", type=int, default=1,
+                    help="worker processes (0 = one per CPU core)")
+    args = ap.parse_args(argv)
+    workers = args.workers or nlp_engine.default_workers()
+    try:
+        nlp_engine.require("Bag of Words (BoW)")
+    except nlp_engine.MissingResource as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if args.cmd == "fit":
+        try:
+            meta = fit(lambda: read_labelled(args.inputs), args.model_dir, workers=workers)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"{meta['n_docs']} document(s), {meta['n_terms']} term(s), classes: "
+              f"{', '.join(meta['classes'])} → {args.model_dir}", file=sys.stderr)
+        return 0
+
+    model = TextClassifier.load(args.model_dir)
+    inputs = args.inputs or ["-"]
+    if args.docs == "files" and "-" in inputs:
+        ap.error("--docs files needs file paths, not stdin")
+    docs = nlp_engine.read_documents(inputs, args.docs)
+    chunk = []
+    for counts in nlp_engine._iter_doc_counts(docs, workers, None):
+        chunk.append(counts)
+        if len(chunk) >= DOC_CHUNK:
+            _print_labels(model, chunk)
+            chunk = []
+    _print_labels(model, chunk)
+    return 0
+
+def _print_labels(model, chunk):
+    if not chunk:
+        return
+    import numpy as np
+    probs = np.exp(model.predict_log_proba(model.transform(chunk)))
+    best = probs.argmax(axis=1)
+    for c, p in zip(best.tolist(), probs[np.arange(len(chunk)), best].tolist()):
+        sys.stdout.write(f"{model.classes[c]}\t{p:.4f}\n")
+
+if __name__ == "__main__":
+    sys.exit(main())